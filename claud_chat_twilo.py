@@ -1,48 +1,247 @@
-from fastapi import FastAPI, Form, Request
-from fastapi.responses import Response
+from fastapi import BackgroundTasks, FastAPI, Form, Request
+from fastapi.responses import Response, StreamingResponse
 from twilio.rest import Client
-from twilio.twiml.messaging_response import MessagingResponse
-from openai import OpenAI
-import json
+from openai import AsyncOpenAI
+from cachetools import LRUCache
+from collections import deque
+import numpy as np
+import orjson
+import redis.asyncio as aioredis
+import tiktoken
+import asyncio
+import functools
+import hashlib
 import os
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
+from xml.sax.saxutils import escape
 from config import (
     TWILIO_ACCOUNT_SID, 
     TWILIO_AUTH_TOKEN, 
     TWILIO_PHONE_NUMBER,
-    OPENAI_API_KEY
+    OPENAI_API_KEY,
+    REDIS_URL
 )
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the tokenizer, then run the interaction log writer for the lifetime of the app"""
+    # Load the tokenizer at boot (off the event loop) so a failed download stops startup
+    # instead of failing the first SMS
+    await asyncio.to_thread(_encoding)
+    log_writer_task = asyncio.create_task(log_writer())
+    yield
+    # Stop the writer, wait for any in-flight batch write to finish, then flush whatever is still queued
+    log_writer_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await log_writer_task
+    entries = []
+    while not log_queue.empty():
+        entries.append(log_queue.get_nowait())
+    if entries:
+        write_log_entries(entries)
+    if dropped_log_entries:
+        print(f"Dropped {dropped_log_entries} chatbot log entries while the log queue was full")
+    if redis_client is not None:
+        await redis_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # Initialize Twilio client
 twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
 
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# Initialize OpenAI client; fail fast so a slow upstream doesn't hold the Twilio webhook open
+openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=2, timeout=10.0)
+
+# Shared system prompt. The same message object is sent first on every request
+# so the provider can reuse its cached prompt prefix across conversations.
+SYSTEM_PROMPT = "You are a knowledgeable medical information assistant providing general health education via SMS. Keep all responses concise and clear due to SMS format limitations.\n\nYour role:\n- Provide accurate, evidence-based medical information for educational purposes only\n- Help users understand basic medical concepts and wellness practices\n- Your responses are NOT a substitute for professional medical advice, diagnosis, or treatment\n\nIMMEDIATELY refer to medical professionals when users describe:\n- Emergency symptoms (chest pain, difficulty breathing, severe injuries)\n- Serious acute conditions requiring urgent care\n- Complex medical issues needing professional diagnosis\n- Medication concerns or drug interactions\n- Mental health crises\n- Any situation where delayed treatment could cause harm\n\nFor serious conditions, respond: 'Please contact a healthcare professional or seek emergency medical attention immediately.'\n\nWhat you can discuss:\n- General medical concepts and common condition information\n- Basic wellness and prevention tips\n- When symptoms warrant medical attention\n- Simple first aid for minor issues\n\nAlways remind users to consult healthcare professionals for personalized medical guidance. Keep responses under 160 characters when possible for SMS compatibility."
+SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT}
+
+# Conversation context is trimmed by tokens, not message count, since that is what
+# OpenAI bills and limits on. The system prompt is sent on every call, so it comes
+# out of the budget first.
+CONTEXT_TOKEN_BUDGET = 1500
+MESSAGE_TOKEN_OVERHEAD = 4  # Role/separator tokens the chat format adds per message
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    """Load the tokenizer on first use; a cold tiktoken cache downloads it, so keep that off import"""
+    return tiktoken.encoding_for_model("gpt-3.5-turbo")
+
+def count_tokens(content: str) -> int:
+    """Count the tokens a chat message with this content costs"""
+    return len(_encoding().encode(content)) + MESSAGE_TOKEN_OVERHEAD
+
+@functools.lru_cache(maxsize=1)
+def conversation_token_budget() -> int:
+    """Tokens left for conversation turns once the system prompt is counted"""
+    return CONTEXT_TOKEN_BUDGET - count_tokens(SYSTEM_PROMPT)
+
+class Conversation:
+    """Per-sender turns, trimmed from the oldest end to stay within the token budget"""
+    
+    def __init__(self):
+        self.turns = deque()
+        self.turn_tokens = deque()
+        self.total_tokens = 0
+    
+    def append(self, role: str, content: str):
+        tokens = count_tokens(content)
+        self.turns.append({"role": role, "content": content})
+        self.turn_tokens.append(tokens)
+        self.total_tokens += tokens
+        
+        # Always keep the newest turn, even if it alone exceeds the budget
+        while self.total_tokens > conversation_token_budget() and len(self.turns) > 1:
+            self.turns.popleft()
+            self.total_tokens -= self.turn_tokens.popleft()
+    
+    def dumps(self) -> bytes:
+        """Serialize turns with their token counts so loading doesn't re-tokenize"""
+        return orjson.dumps({"turns": list(self.turns), "tokens": list(self.turn_tokens)})
+    
+    @classmethod
+    def loads(cls, raw: bytes) -> "Conversation":
+        data = orjson.loads(raw)
+        conversation = cls()
+        conversation.turns.extend(data["turns"])
+        conversation.turn_tokens.extend(data["tokens"])
+        conversation.total_tokens = sum(conversation.turn_tokens)
+        return conversation
 
-# Store conversation history (in production, use a database)
-conversation_history = {}
+# TwiML envelope is constant; only the escaped message body changes per reply
+TWIML_TEMPLATE = '<?xml version="1.0" encoding="UTF-8"?><Response><Message>{}</Message></Response>'
+
+# Store conversation history. With REDIS_URL set, conversations live in Redis
+# (expiring after a period of inactivity) so every worker sees the same context;
+# otherwise they are kept in a bounded per-process LRU.
+MAX_CONVERSATION_SENDERS = 1024
+CONVERSATION_TTL_SECONDS = 3600
+conversation_history = LRUCache(maxsize=MAX_CONVERSATION_SENDERS)
+redis_client = aioredis.from_url(REDIS_URL) if REDIS_URL else None
+
+def _conversation_key(phone_number: str) -> str:
+    return f"conv:{phone_number}"
+
+async def load_conversation(phone_number: str) -> Conversation:
+    """Get or initialize the conversation for a phone number"""
+    if redis_client is not None:
+        raw = await redis_client.get(_conversation_key(phone_number))
+        return Conversation.loads(raw) if raw else Conversation()
+    
+    conversation = conversation_history.get(phone_number)
+    if conversation is None:
+        conversation = Conversation()
+        conversation_history[phone_number] = conversation
+    return conversation
+
+async def save_conversation(phone_number: str, conversation: Conversation):
+    """Persist the conversation (in-memory conversations are updated in place)"""
+    if redis_client is not None:
+        await redis_client.set(_conversation_key(phone_number), conversation.dumps(), ex=CONVERSATION_TTL_SECONDS)
+
+# Interaction log, written as JSON Lines so each SMS is a single append.
+# Entries are queued and written in batches by a background task so the
+# webhook never waits on disk I/O; when the queue is full entries are dropped.
+LOG_FILE = "chatbot_logs.jsonl"
+LOG_QUEUE_SIZE = 10_000
+LOG_BATCH_SIZE = 100
+LOG_DUMPS_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NAIVE_UTC
+log_queue: asyncio.Queue = asyncio.Queue(maxsize=LOG_QUEUE_SIZE)
+dropped_log_entries = 0
+
+# Semantic response cache: answers to opening questions are reused for
+# near-duplicate opening questions from any sender, skipping the completion call.
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 1536
+SEMANTIC_CACHE_SIZE = 1024
+SEMANTIC_CACHE_THRESHOLD = 0.92
+
+class SemanticCache:
+    """Fixed-size ring of (embedding, response) pairs searched by cosine similarity"""
+    
+    def __init__(self, size: int, dimensions: int, threshold: float):
+        self.vectors = np.zeros((size, dimensions), dtype=np.float32)
+        self.responses = [None] * size
+        self.threshold = threshold
+        self.count = 0
+        self.next_slot = 0
+    
+    def lookup(self, vector: np.ndarray):
+        """Return the cached response most similar to vector, if above threshold"""
+        if not self.count:
+            return None
+        scores = self.vectors[:self.count] @ vector
+        best = int(scores.argmax())
+        return self.responses[best] if scores[best] >= self.threshold else None
+    
+    def add(self, vector: np.ndarray, response: str):
+        """Store a response, overwriting the oldest entry when full"""
+        self.vectors[self.next_slot] = vector
+        self.responses[self.next_slot] = response
+        self.next_slot = (self.next_slot + 1) % len(self.responses)
+        self.count = min(self.count + 1, len(self.responses))
 
-def get_chatbot_response(user_message: str, phone_number: str) -> str:
+semantic_cache = SemanticCache(SEMANTIC_CACHE_SIZE, EMBEDDING_DIMENSIONS, SEMANTIC_CACHE_THRESHOLD)
+
+# Exact-match response cache, checked before any embedding call. Keyed on the
+# normalized message plus the previous turn, since the same text can need a
+# different answer in a different conversation.
+EXACT_CACHE_SIZE = 4096
+exact_cache = LRUCache(maxsize=EXACT_CACHE_SIZE)
+
+def _digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode()).digest()[:16]
+
+def exact_cache_key(user_message: str, history) -> tuple:
+    """Build the exact-match cache key for a message in its conversation"""
+    previous_turn = _digest(history[-1]["content"]) if history else b""
+    return _digest(user_message.strip().lower()), previous_turn
+
+async def embed_message(text: str):
+    """Embed text as a unit vector, or return None if the embedding call fails"""
+    try:
+        response = await openai_client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+    except Exception as e:
+        print(f"Error getting OpenAI embedding: {e}")
+        return None
+    vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+async def get_chatbot_response(user_message: str, phone_number: str) -> str:
     """Get response from OpenAI API with conversation context"""
     
     # Get or initialize conversation history for this phone number
-    if phone_number not in conversation_history:
-        conversation_history[phone_number] = [
-            {"role": "system", 
-            "content": "You are a knowledgeable medical information assistant providing general health education via SMS. Keep all responses concise and clear due to SMS format limitations.\n\nYour role:\n- Provide accurate, evidence-based medical information for educational purposes only\n- Help users understand basic medical concepts and wellness practices\n- Your responses are NOT a substitute for professional medical advice, diagnosis, or treatment\n\nIMMEDIATELY refer to medical professionals when users describe:\n- Emergency symptoms (chest pain, difficulty breathing, severe injuries)\n- Serious acute conditions requiring urgent care\n- Complex medical issues needing professional diagnosis\n- Medication concerns or drug interactions\n- Mental health crises\n- Any situation where delayed treatment could cause harm\n\nFor serious conditions, respond: 'Please contact a healthcare professional or seek emergency medical attention immediately.'\n\nWhat you can discuss:\n- General medical concepts and common condition information\n- Basic wellness and prevention tips\n- When symptoms warrant medical attention\n- Simple first aid for minor issues\n\nAlways remind users to consult healthcare professionals for personalized medical guidance. Keep responses under 160 characters when possible for SMS compatibility."}
-            
-        ]
+    conversation = await load_conversation(phone_number)
+    history = conversation.turns
+    
+    # Serve byte-identical messages (in the same context) straight from the cache
+    cache_key = exact_cache_key(user_message, history)
+    cached_response = exact_cache.get(cache_key)
     
-    # Add user message to history
-    conversation_history[phone_number].append({"role": "user", "content": user_message})
+    # Opening questions don't depend on prior context, so near-duplicates can be answered from the cache
+    query_vector = None
+    if cached_response is None and not history:
+        query_vector = await embed_message(user_message)
+        if query_vector is not None:
+            cached_response = semantic_cache.lookup(query_vector)
     
     try:
+        if cached_response is not None:
+            exact_cache[cache_key] = cached_response
+            conversation.append("user", user_message)
+            conversation.append("assistant", cached_response)
+            await save_conversation(phone_number, conversation)
+            return cached_response
+        
+        # Add user message to history (token budgeting happens here, so keep it inside the guard)
+        conversation.append("user", user_message)
+        
         # Get response from OpenAI
-        response = openai_client.chat.completions.create(
+        response = await openai_client.chat.completions.create(
             model="gpt-3.5-turbo",  # or "gpt-4" if you have access
-            messages=conversation_history[phone_number],
+            messages=[SYSTEM_MSG, *history],
             max_tokens=150,  # Keep responses short for SMS
             temperature=0.7
         )
@@ -50,11 +249,12 @@ def get_chatbot_response(user_message: str, phone_number: str) -> str:
         assistant_message = response.choices[0].message.content.strip()
         
         # Add assistant response to history
-        conversation_history[phone_number].append({"role": "assistant", "content": assistant_message})
+        conversation.append("assistant", assistant_message)
+        await save_conversation(phone_number, conversation)
         
-        # Keep only last 10 messages to prevent context from getting too long
-        if len(conversation_history[phone_number]) > 10:
-            conversation_history[phone_number] = conversation_history[phone_number][-10:]
+        exact_cache[cache_key] = assistant_message
+        if query_vector is not None:
+            semantic_cache.add(query_vector, assistant_message)
         
         return assistant_message
         
@@ -66,14 +266,9 @@ def get_chatbot_response(user_message: str, phone_number: str) -> str:
 async def chat_endpoint(query: str):
     """Direct chat endpoint for testing (your original idea)"""
     try:
-        system_prompt = {
-            "role": "system",
-            "content": "You are a knowledgeable medical information assistant providing general health education via SMS. Keep all responses concise and clear due to SMS format limitations.\n\nYour role:\n- Provide accurate, evidence-based medical information for educational purposes only\n- Help users understand basic medical concepts and wellness practices\n- Your responses are NOT a substitute for professional medical advice, diagnosis, or treatment\n\nIMMEDIATELY refer to medical professionals when users describe:\n- Emergency symptoms (chest pain, difficulty breathing, severe injuries)\n- Serious acute conditions requiring urgent care\n- Complex medical issues needing professional diagnosis\n- Medication concerns or drug interactions\n- Mental health crises\n- Any situation where delayed treatment could cause harm\n\nFor serious conditions, respond: 'Please contact a healthcare professional or seek emergency medical attention immediately.'\n\nWhat you can discuss:\n- General medical concepts and common condition information\n- Basic wellness and prevention tips\n- When symptoms warrant medical attention\n- Simple first aid for minor issues\n\nAlways remind users to consult healthcare professionals for personalized medical guidance. Keep responses under 160 characters when possible for SMS compatibility."
-        }
-
-        response = openai_client.chat.completions.create(
+        response = await openai_client.chat.completions.create(
             model="gpt-3.5-turbo",
-            messages=[system_prompt,{"role": "user", "content": query}],
+            messages=[SYSTEM_MSG, {"role": "user", "content": query}],
             max_tokens=500,
             temperature=0.7
         )
@@ -88,59 +283,84 @@ async def handle_sms(request: Request, Body: str = Form(...), From: str = Form(.
     print(f"Received SMS from {From}: {Body}")
     
     # Get chatbot response
-    bot_response = get_chatbot_response(Body, From)
+    bot_response = await get_chatbot_response(Body, From)
     
     # Create TwiML response
-    twiml_response = MessagingResponse()
-    twiml_response.message(bot_response)
+    twiml_response = TWIML_TEMPLATE.format(escape(bot_response))
     
     # Log the interaction
     log_interaction(From, Body, bot_response)
     
-    return Response(content=str(twiml_response), media_type="application/xml")
+    return Response(content=twiml_response, media_type="application/xml")
 
 def log_interaction(phone_number: str, user_message: str, bot_response: str):
-    """Log conversation for debugging/analytics"""
+    """Queue conversation log entry for debugging/analytics"""
+    global dropped_log_entries
     log_entry = {
-        "timestamp": str(datetime.utcnow()),
+        "timestamp": datetime.utcnow(),
         "phone_number": phone_number,
         "user_message": user_message,
         "bot_response": bot_response
     }
     
-    log_file = "chatbot_logs.json"
-    
-    # Load existing logs
-    if os.path.exists(log_file):
-        with open(log_file, "r") as f:
-            try:
-                logs = json.load(f)
-                if not isinstance(logs, list):
-                    logs = [logs]
-            except json.JSONDecodeError:
-                logs = []
-    else:
-        logs = []
-    
-    # Add new log entry
-    logs.append(log_entry)
+    try:
+        log_queue.put_nowait(log_entry)
+    except asyncio.QueueFull:
+        dropped_log_entries += 1
+
+def write_log_entries(entries: list):
+    """Append a batch of log entries to the log file with a single flush"""
+    # Append-only JSON Lines: one compact object per line, no rewrite of past entries
+    with open(LOG_FILE, "ab") as f:
+        f.write(b"".join(orjson.dumps(entry, option=LOG_DUMPS_OPTIONS) for entry in entries))
+
+async def log_writer():
+    """Drain the log queue in batches and write them off the event loop"""
+    while True:
+        entries = [await log_queue.get()]
+        while len(entries) < LOG_BATCH_SIZE and not log_queue.empty():
+            entries.append(log_queue.get_nowait())
+        # Cancelling to_thread doesn't stop the thread, so on shutdown let the
+        # in-flight batch finish before the lifespan flushes the rest
+        write = asyncio.ensure_future(asyncio.to_thread(write_log_entries, entries))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            await asyncio.wait([write])
+            raise
+        except Exception as e:
+            print(f"Error writing chatbot logs: {e}")
+
+@app.get("/logs")
+async def get_logs():
+    """Stream logged interactions as JSON Lines"""
+    def iter_log_lines():
+        if not os.path.exists(LOG_FILE):
+            return
+        with open(LOG_FILE, "r") as f:
+            yield from f
     
-    # Save logs
-    with open(log_file, "w") as f:
-        json.dump(logs, f, indent=2)
+    return StreamingResponse(iter_log_lines(), media_type="application/x-ndjson")
 
-@app.post("/send-sms")
-async def send_sms(phone_number: str, message: str):
-    """Endpoint to send SMS manually (useful for notifications)"""
+async def send_sms_task(phone_number: str, message: str):
+    """Send an SMS through Twilio (runs after the response has been returned)"""
     try:
-        message = twilio_client.messages.create(
+        # The Twilio SDK is sync-only, so keep its HTTP call off the event loop
+        sent_message = await asyncio.to_thread(
+            twilio_client.messages.create,
             from_=TWILIO_PHONE_NUMBER,
             body=message,
             to=phone_number
         )
-        return {"success": True, "message_sid": message.sid}
+        print(f"Sent SMS to {phone_number}: {sent_message.sid}")
     except Exception as e:
-        return {"success": False, "error": str(e)}
+        print(f"Error sending SMS to {phone_number}: {e}")
+
+@app.post("/send-sms")
+async def send_sms(phone_number: str, message: str, background_tasks: BackgroundTasks):
+    """Endpoint to send SMS manually (useful for notifications)"""
+    background_tasks.add_task(send_sms_task, phone_number, message)
+    return {"success": True, "queued": True}
 
 @app.get("/")
 async def root():
@@ -149,8 +369,11 @@ async def root():
 @app.get("/conversation/{phone_number}")
 async def get_conversation(phone_number: str):
     """Get conversation history for a specific phone number"""
+    if redis_client is not None:
+        raw = await redis_client.get(_conversation_key(phone_number))
+        return {"conversation": Conversation.loads(raw).turns if raw else []}
     if phone_number in conversation_history:
-        return {"conversation": conversation_history[phone_number]}
+        return {"conversation": conversation_history[phone_number].turns}
     else:
         return {"conversation": []}
 
@@ -1,5 +1,6 @@
 import logging
-from collections import deque
+from collections import defaultdict, deque
+from itertools import islice
 from typing import List, Dict
 from datetime import datetime
 
@@ -9,52 +10,101 @@ class MemoryLogHandler(logging.Handler):
     def __init__(self, max_logs: int = 1000):
         super().__init__()
         self.max_logs = max_logs
-        self.logs = deque(maxlen=max_logs)  # Automatically removes old logs when full
+        # Pre-allocated ring buffer: the oldest slot is overwritten when full.
+        # Writes are serialized by the handler lock (held by Handler.handle around emit);
+        # readers take the same lock only to snapshot entries, and format them outside it.
+        self.buffer = [None] * max_logs
+        self.head = 0  # Next slot to write
+        self.count = 0
+        self.logs_by_level = defaultdict(deque)  # Per-level index, evicted in step with the ring
         
     def emit(self, record):
-        """Store log record in memory"""
+        """Store log record fields in memory (timestamp and Formatter work is deferred until logs are read)"""
         try:
-            # Format the log message
+            # Merge args now: they may be mutable objects that change (or stay alive) after this call
+            message = record.getMessage()
+            exc_text = record.exc_text
+            if record.exc_info and not exc_text:
+                exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            
+            # Keys mirror LogRecord attributes so the entry can be rebuilt with makeLogRecord
+            # ("msg" is already merged, so the rebuilt record has no args)
             log_entry = {
-                "timestamp": datetime.fromtimestamp(record.created).isoformat(),
-                "level": record.levelname,
-                "logger": record.name,
-                "function": record.funcName,
-                "line": record.lineno,
-                "message": self.format(record)
+                "created": record.created,
+                "msecs": record.msecs,
+                "levelno": record.levelno,
+                "levelname": record.levelname,
+                "name": record.name,
+                "funcName": record.funcName,
+                "lineno": record.lineno,
+                "msg": message,
+                "exc_text": exc_text
             }
             
-            self.logs.append(log_entry)
+            evicted = self.buffer[self.head]
+            if evicted is not None:
+                # The entry being overwritten is also the oldest one of its level
+                self.logs_by_level[evicted["levelname"]].popleft()
+            self.buffer[self.head] = log_entry
+            self.logs_by_level[record.levelname].append(log_entry)
+            
+            # Publish the slot before advancing head/count so readers never see an empty slot
+            self.head = (self.head + 1) % self.max_logs
+            if self.count < self.max_logs:
+                self.count += 1
             
         except Exception:
             # Don't let logging errors break the application
             pass
     
+    def _render(self, log_entry: Dict) -> Dict:
+        """Format a stored log entry for output"""
+        try:
+            message = self.format(logging.makeLogRecord(log_entry))
+        except Exception:
+            # One bad entry must not break every read; fall back to the merged message
+            message = log_entry["msg"]
+        return {
+            "timestamp": datetime.fromtimestamp(log_entry["created"]).isoformat(),
+            "level": log_entry["levelname"],
+            "logger": log_entry["name"],
+            "function": log_entry["funcName"],
+            "line": log_entry["lineno"],
+            "message": message
+        }
+    
     def get_logs(self, limit: int = 100) -> List[Dict]:
         """Get recent logs"""
-        if limit >= len(self.logs):
-            return list(self.logs)
-        else:
-            # Get the most recent logs
-            return list(self.logs)[-limit:]
+        # Snapshot under the handler lock so a concurrent clear_logs can't swap the buffer mid-read
+        with self.lock:
+            count = min(limit, self.count)
+            head = self.head
+            recent = [self.buffer[(head - offset) % self.max_logs] for offset in range(count, 0, -1)]
+        return [self._render(log) for log in recent]
     
     def get_logs_by_level(self, level: str, limit: int = 100) -> List[Dict]:
         """Get logs filtered by level"""
-        filtered = [log for log in self.logs if log["level"] == level.upper()]
-        return filtered[-limit:] if limit < len(filtered) else filtered
+        with self.lock:
+            recent = list(islice(reversed(self.logs_by_level.get(level.upper(), ())), limit))
+        recent.reverse()
+        return [self._render(log) for log in recent]
     
     def clear_logs(self):
         """Clear all logs"""
-        self.logs.clear()
+        with self.lock:
+            self.buffer = [None] * self.max_logs
+            self.head = 0
+            self.count = 0
+            self.logs_by_level.clear()
     
     def get_log_count(self) -> int:
         """Get total number of logs in memory"""
-        return len(self.logs)
+        return self.count
     
     def get_memory_usage_info(self) -> Dict:
         """Get information about memory usage"""
         return {
-            "current_logs": len(self.logs),
+            "current_logs": self.count,
             "max_logs": self.max_logs,
-            "memory_usage_percent": (len(self.logs) / self.max_logs) * 100
+            "memory_usage_percent": (self.count / self.max_logs) * 100
         }
\ No newline at end of file
@@ -1,7 +1,14 @@
 import time
 from typing import Dict, Any
+import orjson
 from fastapi.responses import JSONResponse
 
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson instead of the stdlib json module"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
 class NetworkResponse:
 
     def __init__(self, version=0.1):
@@ -9,10 +16,10 @@ class NetworkResponse:
 
     def success_response(
         self, http_code: int, message: str,data: Dict[str, Any], resource: str, start_time: float
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         duration = round(time.time() - start_time, 2)
         # Serialize response data including any datetime objects
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=http_code,
             content={
                 "success": True,
@@ -25,9 +32,9 @@ class NetworkResponse:
 
     def json_response(
         self, http_code: int, error_message: str, resource: str, start_time: float
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         duration = round(time.time() - start_time, 2)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=http_code,
             content={
                 "code": http_code,
@@ -0,0 +1,13 @@
+import logging
+import queue
+from logging.handlers import QueueHandler
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of raising when the queue is full"""
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block or fail the caller because the log writer fell behind
+            pass
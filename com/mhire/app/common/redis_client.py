@@ -0,0 +1,16 @@
+import logging
+from typing import Optional
+import redis.asyncio as aioredis
+from com.mhire.app.config.config import config
+
+logger = logging.getLogger(__name__)
+
+def _create_redis_client() -> Optional[aioredis.Redis]:
+    """Create the shared Redis client, or None when REDIS_URL is not configured"""
+    if not config.redis_url:
+        return None
+    logger.info("Using Redis for shared state")
+    return aioredis.from_url(config.redis_url)
+
+# Shared by every service; None means callers fall back to in-process storage
+redis_client = _create_redis_client()
\ No newline at end of file
@@ -1,5 +1,7 @@
 import os
 import logging
+from dataclasses import dataclass
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -7,38 +9,59 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+@dataclass(frozen=True, slots=True)
 class Config:
-    _instance = None
+    """Application configuration, loaded once at import"""
+    # OpenAI Configuration
+    openai_api_key: Optional[str]
+    model_name: str
+    fast_model_name: str  # Used for short messages early in a conversation
+    llm_concurrency: int  # Max in-flight LLM calls per process
+    llm_queue_timeout: float  # Seconds to wait for a free LLM slot before rejecting
+    
+    # Twilio Configuration
+    twilio_account_sid: Optional[str]
+    twilio_auth_token: Optional[str]
+    twilio_phone_number: Optional[str]
+    
+    # Redis Configuration (optional; shared state across workers)
+    redis_url: Optional[str]
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(Config, cls).__new__(cls)
-            cls._instance._initialize()
-        return cls._instance
+def _load_config() -> Config:
+    """Initialize configuration values from environment variables"""
+    loaded = Config(
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        model_name=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
+        fast_model_name=os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini"),
+        llm_concurrency=int(os.getenv("LLM_CONCURRENCY", "20")),
+        llm_queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "0.2")),
+        twilio_account_sid=os.getenv("TWILIO_ACCOUNT_SID"),
+        twilio_auth_token=os.getenv("TWILIO_AUTH_TOKEN"),
+        twilio_phone_number=os.getenv("TWILIO_PHONE_NUMBER"),
+        redis_url=os.getenv("REDIS_URL")
+    )
+    
+    logger.debug(f"Config initialized - Model: {loaded.model_name}, Fast model: {loaded.fast_model_name}, LLM concurrency: {loaded.llm_concurrency}")
+    if loaded.openai_api_key:
+        logger.debug(f"OpenAI API key loaded: {loaded.openai_api_key[:10]}...")
+    else:
+        logger.error("OpenAI API key not found in environment variables!")
+    
+    if loaded.twilio_account_sid:
+        logger.debug(f"Twilio Account SID loaded: {loaded.twilio_account_sid[:10]}...")
+    else:
+        logger.warning("Twilio Account SID not found in environment variables!")
     
-    def _initialize(self):
-        """Initialize configuration values"""
-        # OpenAI Configuration
-        self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        self.model_name = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
-        
-        # Twilio Configuration
-        self.twilio_account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-        self.twilio_auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-        self.twilio_phone_number = os.getenv("TWILIO_PHONE_NUMBER")
-        
-        logger.debug(f"Config initialized - Model: {self.model_name}")
-        if self.openai_api_key:
-            logger.debug(f"OpenAI API key loaded: {self.openai_api_key[:10]}...")
-        else:
-            logger.error("OpenAI API key not found in environment variables!")
-            
-        if self.twilio_account_sid:
-            logger.debug(f"Twilio Account SID loaded: {self.twilio_account_sid[:10]}...")
-        else:
-            logger.warning("Twilio Account SID not found in environment variables!")
-            
-        if self.twilio_phone_number:
-            logger.debug(f"Twilio Phone Number loaded: {self.twilio_phone_number}")
-        else:
-            logger.warning("Twilio Phone Number not found in environment variables!")
\ No newline at end of file
+    if loaded.twilio_phone_number:
+        logger.debug(f"Twilio Phone Number loaded: {loaded.twilio_phone_number}")
+    else:
+        logger.warning("Twilio Phone Number not found in environment variables!")
+    
+    if loaded.redis_url:
+        logger.debug("Redis URL loaded")
+    else:
+        logger.debug("Redis URL not set, using in-memory stores")
+    
+    return loaded
+
+config = _load_config()
\ No newline at end of file
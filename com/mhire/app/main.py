@@ -1,12 +1,17 @@
 import logging
+import queue
 import time
+from logging.handlers import QueueListener
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from com.mhire.app.services.chatbot_services.ai_chatbot.ai_chatbot_router import router as chatbot_router
 from com.mhire.app.services.twilio_services.twilio_sms.twilio_sms_router import router as twilio_sms_router
-from com.mhire.app.common.network_responses import NetworkResponse, HTTPCode
+from com.mhire.app.common.network_responses import NetworkResponse, HTTPCode, ORJSONResponse
 from com.mhire.app.common.memory_log_handler import MemoryLogHandler
+from com.mhire.app.common.queue_log_handler import DroppingQueueHandler
+from com.mhire.app.common.redis_client import redis_client
 
 # Setup in-memory logging (no file logging)
 memory_log_handler = MemoryLogHandler(max_logs=2000)  # Store up to 2000 logs in memory
@@ -14,19 +19,36 @@ memory_log_handler.setFormatter(
     logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s')
 )
 
+# Console output is written by a background listener thread, so request handlers only enqueue records
+log_queue = queue.Queue(maxsize=10000)
+log_listener = QueueListener(log_queue, logging.StreamHandler(), respect_handler_level=True)
+
 # Configure root logger
 root_logger = logging.getLogger()
 root_logger.setLevel(logging.DEBUG)
 root_logger.handlers.clear()  # Remove any existing handlers
-root_logger.addHandler(logging.StreamHandler())  # Console output
+root_logger.addHandler(DroppingQueueHandler(log_queue))  # Console output (via log_listener)
 root_logger.addHandler(memory_log_handler)  # Memory storage
 
 logger = logging.getLogger(__name__)
+network_response = NetworkResponse()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener.start()
+    yield
+    if redis_client is not None:
+        await redis_client.aclose()
+        logger.info("Closed Redis client")
+    # Stopping flushes any records still queued
+    log_listener.stop()
 
 app = FastAPI(
     title="AI Chatbot",
     description="AI-powered chatbot with escalation logic",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -44,37 +66,36 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     """Handle Pydantic validation errors using NetworkResponse format"""
     start_time = time.time()
     
-    # Determine resource based on URL path
-    resource = "validation_error"
-    if "/chat/send" in str(request.url):
-        resource = request.url.path
-    elif "/chat" in str(request.url):
-        resource = request.url.path
-    elif "/webhooks" in str(request.url):
-        resource = request.url.path
+    # request.url.path is already a str; str(request.url) would rebuild the full URL
+    path = request.url.path
+    errors = exc.errors()
     
-    logger.warning(f"Validation error on {request.url}: {exc.errors()}")
+    logger.warning(f"Validation error on {path}: {errors}")
     
     # Extract the first error for the main message
-    first_error = exc.errors()[0] if exc.errors() else {}
+    first_error = errors[0] if errors else {}
     field_name = " -> ".join(str(loc) for loc in first_error.get("loc", [])[1:])  # Skip 'body'
     error_msg = first_error.get("msg", "Validation error")
     
     # Create user-friendly error message
+    http_code = HTTPCode.UNPROCESSABLE_ENTITY
     if first_error.get("type") == "enum":
         if "organization_type" in field_name:
             error_msg = "Invalid organization type. Must be 'SMB' or 'HRH'"
     elif first_error.get("type") == "missing":
         error_msg = f"Required field '{field_name}' is missing"
     elif first_error.get("type") == "string_too_short":
+        http_code = HTTPCode.BAD_REQUEST
         error_msg = f"Field '{field_name}' cannot be empty"
+    elif first_error.get("type") == "string_too_long":
+        http_code = HTTPCode.PAYLOAD_TOO_LARGE
+        error_msg = f"Field '{field_name}' is too long. Maximum {first_error['ctx']['max_length']} characters allowed."
     
     # Use NetworkResponse format
-    network_response = NetworkResponse()
     return network_response.json_response(
-        http_code=HTTPCode.UNPROCESSABLE_ENTITY,
+        http_code=http_code,
         error_message=error_msg,
-        resource=request.url.path,
+        resource=path,
         start_time=start_time
     )
 
@@ -87,7 +108,6 @@ logger.info("FastAPI application started successfully")
 @app.get("/")
 async def root():
     start_time = time.time()
-    network_response = NetworkResponse()
     return network_response.success_response(
         http_code=HTTPCode.SUCCESS,
         message="API is running",
@@ -99,7 +119,6 @@ async def root():
 @app.get("/health")
 async def health_check():
     start_time = time.time()
-    network_response = NetworkResponse()
     return network_response.success_response(
         http_code=HTTPCode.SUCCESS,
         message="Service is healthy",
@@ -115,7 +134,6 @@ async def get_application_logs(
 ):
     """Get application logs from memory"""
     start_time = time.time()
-    network_response = NetworkResponse()
     
     try:
         if level:
@@ -147,7 +165,6 @@ async def get_application_logs(
 async def clear_application_logs():
     """Clear all application logs from memory"""
     start_time = time.time()
-    network_response = NetworkResponse()
     
     try:
         memory_log_handler.clear_logs()
@@ -1,9 +1,15 @@
+import asyncio
+import hashlib
+import json
 import logging
-import uuid
-from typing import Optional, Dict, List
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
-from com.mhire.app.config.config import Config
+import httpx
+import openai
+from itertools import islice
+from cachetools import TTLCache
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
+from typing import Any, Optional, Dict, List, Set, AsyncIterator
+from com.mhire.app.config.config import config
+from com.mhire.app.common.redis_client import redis_client
 from com.mhire.app.services.chatbot_services.ai_chatbot.ai_chatbot_schema import (
     ChatRequest, ChatResponse, EscalationType, OrganizationType
 )
@@ -14,57 +20,133 @@ from com.mhire.app.services.chatbot_services.chatbot_utils.session_utils.session
 
 logger = logging.getLogger(__name__)
 
+# Shared connection pool for OpenAI calls. httpx's default pool is too small for
+# many concurrent chats and queues requests behind each other; closed on app shutdown.
+http_async_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+    http2=True,
+    timeout=httpx.Timeout(30.0, connect=5.0)
+)
+
+# Bulkhead around LLM calls: caps in-flight requests to OpenAI and rejects quickly
+# when every slot is busy instead of queueing until the provider rate-limits us.
+LLM_SEM = asyncio.Semaphore(config.llm_concurrency)
+
+# Transient OpenAI failures worth retrying; anything else falls back immediately
+RETRYABLE_LLM_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)
+
+class LLMCapacityError(Exception):
+    """Raised when no LLM slot frees up within the configured queue timeout"""
+
+async def _acquire_llm_slot():
+    """Acquire an LLM slot or raise LLMCapacityError"""
+    try:
+        await asyncio.wait_for(LLM_SEM.acquire(), timeout=config.llm_queue_timeout)
+    except asyncio.TimeoutError:
+        logger.warning("All %s LLM slots busy, rejecting request", config.llm_concurrency)
+        raise LLMCapacityError("AI service is at capacity")
+
+# Messages shorter than this, with fewer prior user turns than this, go to the fast model
+FAST_MODEL_MAX_MESSAGE_CHARS = 120
+FAST_MODEL_MAX_HISTORY = 4
+
+# Completed responses cached by prompt, so repeated exchanges (greetings, FAQs) skip OpenAI.
+# Stored in Redis when configured so every worker shares hits, otherwise in-process.
+RESPONSE_CACHE_TTL_SECONDS = 3600
+response_cache = TTLCache(maxsize=1024, ttl=RESPONSE_CACHE_TTL_SECONDS)
+
+def _response_cache_key(model_name: str, prompt: tuple) -> str:
+    digest = hashlib.blake2b(json.dumps([model_name, prompt]).encode(), digest_size=16)
+    return f"chat:{digest.hexdigest()}"
+
+async def _get_cached_response(cache_key: str) -> Optional[str]:
+    """Get a cached response, treating cache errors as a miss"""
+    if redis_client is None:
+        return response_cache.get(cache_key)
+    try:
+        cached = await redis_client.get(cache_key)
+    except Exception as e:
+        logger.warning("Response cache read failed: %s", e)
+        return None
+    return cached.decode() if cached is not None else None
+
+async def _set_cached_response(cache_key: str, response: str):
+    """Cache a response, ignoring cache errors"""
+    if redis_client is None:
+        response_cache[cache_key] = response
+        return
+    try:
+        await redis_client.set(cache_key, response, ex=RESPONSE_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning("Response cache write failed: %s", e)
+
 class AIChatbot:
     def __init__(self):
         logger.debug("Initializing AIChatbot...")
-        self.config = Config()
+        self.config = config
         
-        logger.debug(f"Creating ChatOpenAI with API key: {self.config.openai_api_key[:10]}...")
+        logger.debug("Creating AsyncOpenAI client with API key: %s...", self.config.openai_api_key[:10])
         
         try:
-            self.llm = ChatOpenAI(
-                openai_api_key=self.config.openai_api_key,
-                model_name=self.config.model_name,
-                temperature=0.7,
-                max_tokens=300
+            self.client = openai.AsyncOpenAI(
+                api_key=self.config.openai_api_key,
+                max_retries=0,  # Retried with backoff in _invoke_llm_uncoalesced
+                http_client=http_async_client
             )
-            logger.info("ChatOpenAI initialized successfully")
+            logger.info("AsyncOpenAI client initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize ChatOpenAI: {str(e)}")
+            logger.error("Failed to initialize AsyncOpenAI client: %s", e)
             raise
         
+        # Chat completion parameters for the main and the fast model
+        self.llm: Dict[str, Any] = {
+            "model": self.config.model_name,
+            "temperature": 0.7,
+            "max_tokens": 300
+        }
+        self.llm_fast: Dict[str, Any] = {
+            "model": self.config.fast_model_name,
+            "temperature": 0.7,
+            "max_tokens": 150
+        }
+        
         # Initialize appointment booking system and session manager
         self.appointment_system = AppointmentBookingSystem()
         self.session_manager = SessionManager()
+        
+        # In-flight LLM calls keyed by prompt, so identical concurrent requests share one call
+        self.inflight_calls: Dict[tuple, asyncio.Task] = {}
+        
+        # Fire-and-forget history writes, referenced here until they finish
+        self.background_tasks: Set[asyncio.Task] = set()
         logger.info("AIChatbot fully initialized with appointment booking system")
 
     async def process_message(self, request: ChatRequest) -> ChatResponse:
         """Process incoming chat message and return appropriate response"""
-        logger.info(f"Processing message: '{request.message[:50]}...'")
+        logger.info("Processing message: '%s...'", request.message[:50])
         
         # Generate session ID if not provided
         session_id = request.session_id or SessionManager.generate_session_id()
-        logger.debug(f"Using session ID: {session_id}")
-        
-        # Get session data
-        session_data = self.session_manager.get_session(session_id)
-        
-        # Check if we're in appointment booking mode
-        if session_data.appointment_state.is_booking:
-            logger.debug("Currently in appointment booking mode")
-            return await self._handle_appointment_booking(request.message, session_id, session_data)
+        logger.debug("Using session ID: %s", session_id)
         
-        # Check for escalation keywords
+        # Check for escalation keywords first (only an escalation during booking needs the session here)
         human_escalation, appointment_escalation = check_escalation_keywords(request.message)
-        logger.debug(f"Escalation check - Human: {human_escalation}, Appointment: {appointment_escalation}")
+        logger.debug("Escalation check - Human: %s, Appointment: %s", human_escalation, appointment_escalation)
         
-        # Handle human escalation (highest priority)
+        # Handle human escalation (highest priority, even during appointment booking)
         if human_escalation:
             logger.info("Human escalation triggered")
             response_text = "Please take action immediately. Based on your message, it's important that you seek immediate medical attention or contact emergency services if this is a medical emergency."
             
-            # Add AI response to history
-            self.session_manager.add_message_to_history(session_id, "ai", response_text)
+            # An in-progress booking stays open; repeat its pending question so the next answer matches what the user sees
+            session_data = await self.session_manager.get_session(session_id)
+            pending_question = self.appointment_system.get_current_question(session_data.appointment_state)
+            if pending_question:
+                logger.debug("Re-asking pending appointment question after human escalation")
+                response_text = f"{response_text}\n\nTo continue booking your appointment (or reply 'cancel'):\n{pending_question}"
+            
+            # Add AI response to history without holding up the reply
+            self._record_in_background(session_id, "ai", response_text)
             
             return ChatResponse(
                 response=response_text,
@@ -75,6 +157,14 @@ class AIChatbot:
                 requires_review=True
             )
         
+        # Get session data
+        session_data = await self.session_manager.get_session(session_id)
+        
+        # Check if we're in appointment booking mode
+        if session_data.appointment_state.is_booking:
+            logger.debug("Currently in appointment booking mode")
+            return await self._handle_appointment_booking(request.message, session_id, session_data)
+        
         # Handle appointment escalation - start booking process
         if appointment_escalation:
             logger.info("Appointment escalation triggered - starting booking process")
@@ -82,10 +172,10 @@ class AIChatbot:
             
             # Update session with new appointment state
             session_data.appointment_state = updated_state
-            self.session_manager.update_session(session_id, session_data)
+            await self.session_manager.update_session(session_id, session_data)
             
             # Add AI response to history
-            self.session_manager.add_message_to_history(session_id, "ai", response_text)
+            await self.session_manager.add_message_to_history(session_id, "ai", response_text)
             
             return ChatResponse(
                 response=response_text,
@@ -98,19 +188,19 @@ class AIChatbot:
         
         # Generate AI response for general queries
         try:
-            logger.debug("Generating AI response with LangChain...")
+            logger.debug("Generating AI response with OpenAI...")
             ai_response = await self._generate_ai_response(
                 request.message, 
                 request.organization_type, 
                 session_id
             )
             
-            logger.info(f"Successfully generated AI response: '{ai_response[:100]}...'")
+            logger.info("Successfully generated AI response: '%s...'", ai_response[:100])
             
             # Add user message to history AFTER generating response to avoid duplicates
-            self.session_manager.add_message_to_history(session_id, "human", request.message)
+            await self.session_manager.add_message_to_history(session_id, "human", request.message)
             # Add AI response to history
-            self.session_manager.add_message_to_history(session_id, "ai", ai_response)
+            await self.session_manager.add_message_to_history(session_id, "ai", ai_response)
             
             return ChatResponse(
                 response=ai_response,
@@ -120,26 +210,95 @@ class AIChatbot:
                 session_id=session_id,
                 requires_review=False
             )
-            
+        
+        except LLMCapacityError:
+            raise
+        
         except Exception as e:
-            logger.error(f"Error generating AI response: {str(e)}", exc_info=True)
+            logger.error("Error generating AI response: %s", e, exc_info=True)
+            return await self._fallback_response(request.message, session_id)
+    
+    async def stream_message(self, request: ChatRequest) -> AsyncIterator[Dict]:
+        """Process incoming chat message, yielding AI response tokens as they are generated
+        
+        Yields {"type": "token", "content": ...} events followed by a final
+        {"type": "response", ...} event carrying the full ChatResponse fields.
+        Escalation and appointment replies are scripted and only send the final event.
+        If the LLM is at capacity a single {"type": "error", ...} event is sent instead.
+        """
+        logger.info("Streaming message: '%s...'", request.message[:50])
+        
+        # Generate session ID if not provided
+        session_id = request.session_id or SessionManager.generate_session_id()
+        
+        # Scripted replies; the session is only read when no escalation keyword matched
+        if any(check_escalation_keywords(request.message)) or (await self.session_manager.get_session(session_id)).appointment_state.is_booking:
+            response = await self.process_message(request.model_copy(update={"session_id": session_id}))
+            yield {"type": "response", **response.model_dump(mode="json")}
+            return
+        
+        chunks = []
+        try:
+            logger.debug("Streaming AI response with OpenAI...")
+            async for chunk in self._stream_ai_response(request.message, request.organization_type, session_id):
+                chunks.append(chunk)
+                yield {"type": "token", "content": chunk}
             
-            # Return fallback response
-            fallback_response = "I'm having trouble processing your request right now. For immediate medical concerns, please contact your healthcare provider or emergency services."
+            ai_response = "".join(chunks).strip()
+            logger.info("Successfully streamed AI response: '%s...'", ai_response[:100])
             
-            # Add fallback response to history
-            self.session_manager.add_message_to_history(session_id, "human", request.message)
-            self.session_manager.add_message_to_history(session_id, "ai", fallback_response)
+            # Record the exchange only once the full response is known
+            await self.session_manager.add_message_to_history(session_id, "human", request.message)
+            await self.session_manager.add_message_to_history(session_id, "ai", ai_response)
             
-            return ChatResponse(
-                response=fallback_response,
-                escalation_type=EscalationType.HUMAN,
-                human_escalation=True,
+            response = ChatResponse(
+                response=ai_response,
+                escalation_type=EscalationType.NONE,
+                human_escalation=False,
                 appointment_escalation=False,
                 session_id=session_id,
-                requires_review=True
+                requires_review=False
             )
-
+        
+        except LLMCapacityError as e:
+            yield {"type": "error", "message": f"{e}. Please try again shortly.", "session_id": session_id}
+            return
+        
+        except Exception as e:
+            logger.error("Error streaming AI response: %s", e, exc_info=True)
+            response = await self._fallback_response(request.message, session_id)
+        
+        yield {"type": "response", **response.model_dump(mode="json")}
+    
+    def _record_in_background(self, session_id: str, message_type: str, content: str):
+        """Add a message to history in a background task"""
+        task = asyncio.create_task(self._record_message(session_id, message_type, content))
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+    
+    async def _record_message(self, session_id: str, message_type: str, content: str):
+        try:
+            await self.session_manager.add_message_to_history(session_id, message_type, content)
+        except Exception as e:
+            logger.error("Failed to record %s message for session %s: %s", message_type, session_id, e)
+    
+    async def _fallback_response(self, user_message: str, session_id: str) -> ChatResponse:
+        """Record and return the fallback response used when the AI call fails"""
+        fallback_response = "I'm having trouble processing your request right now. For immediate medical concerns, please contact your healthcare provider or emergency services."
+        
+        # Add fallback response to history
+        await self.session_manager.add_message_to_history(session_id, "human", user_message)
+        await self.session_manager.add_message_to_history(session_id, "ai", fallback_response)
+        
+        return ChatResponse(
+            response=fallback_response,
+            escalation_type=EscalationType.HUMAN,
+            human_escalation=True,
+            appointment_escalation=False,
+            session_id=session_id,
+            requires_review=True
+        )
+    
     async def _handle_appointment_booking(self, user_message: str, session_id: str, session_data) -> ChatResponse:
         """Handle appointment booking conversation flow"""
         logger.debug("Handling appointment booking flow")
@@ -151,10 +310,10 @@ class AIChatbot:
             
             # Update session
             session_data.appointment_state = updated_state
-            self.session_manager.update_session(session_id, session_data)
+            await self.session_manager.update_session(session_id, session_data)
             
             # Add AI response to history
-            self.session_manager.add_message_to_history(session_id, "ai", response_text)
+            await self.session_manager.add_message_to_history(session_id, "ai", response_text)
             
             return ChatResponse(
                 response=response_text,
@@ -172,10 +331,10 @@ class AIChatbot:
         
         # Update session
         session_data.appointment_state = updated_state
-        self.session_manager.update_session(session_id, session_data)
+        await self.session_manager.update_session(session_id, session_data)
         
         # Add AI response to history
-        self.session_manager.add_message_to_history(session_id, "ai", response_text)
+        await self.session_manager.add_message_to_history(session_id, "ai", response_text)
         
         # Determine escalation type based on completion
         escalation_type = EscalationType.NONE if is_complete else EscalationType.APPOINTMENT
@@ -188,58 +347,134 @@ class AIChatbot:
             session_id=session_id,
             requires_review=False
         )
-
+    
+    async def _build_messages(self, message: str, org_type: OrganizationType, session_id: str) -> List:
+        """Build the OpenAI chat message list for a user message and its conversation history"""
+        # Get conversation history BEFORE adding current message
+        history = await self.session_manager.get_conversation_history(session_id)
+        logger.debug("Retrieved %s messages from history", len(history))
+        
+        # Get system prompt based on organization type
+        system_prompt = get_system_prompt(org_type)
+        logger.debug("Using system prompt for org type: %s", org_type)
+        
+        # Build messages for OpenAI API
+        messages = [{"role": "system", "content": system_prompt}]
+        
+        # Add the user's turns from the last 10 messages (AI messages are skipped to avoid confusion)
+        recent_history = islice(history, max(len(history) - 10, 0), None)
+        messages.extend({"role": "user", "content": msg["content"]} for msg in recent_history if msg["type"] == "human")
+        
+        # Add current message (only once!)
+        messages.append({"role": "user", "content": message})
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending %s messages to OpenAI", len(messages))
+            logger.debug("System prompt: %s...", system_prompt[:100])
+            logger.debug("User message: %s", message)
+        
+        return messages
+    
     async def _generate_ai_response(self, message: str, org_type: OrganizationType, session_id: str) -> str:
-        """Generate AI response using LangChain ChatOpenAI with conversation history"""
-        logger.debug(f"Generating AI response for org type: {org_type}, session: {session_id}")
+        """Generate AI response using OpenAI chat completions with conversation history"""
+        logger.debug("Generating AI response for org type: %s, session: %s", org_type, session_id)
         
         try:
-            # Get conversation history BEFORE adding current message
-            history = self.session_manager.get_conversation_history(session_id)
-            logger.debug(f"Retrieved {len(history)} messages from history")
-            
-            # Get system prompt based on organization type
-            system_prompt = get_system_prompt(org_type)
-            logger.debug(f"Using system prompt for org type: {org_type}")
-            
-            # Build messages for OpenAI API
-            messages = [SystemMessage(content=system_prompt)]
+            messages = await self._build_messages(message, org_type, session_id)
             
-            # Add conversation history (limit to last 10 messages to avoid token limits)
-            recent_history = history[-10:] if len(history) > 10 else history
-            
-            for msg in recent_history:
-                if msg["type"] == "human":
-                    messages.append(HumanMessage(content=msg["content"]))
-                elif msg["type"] == "ai":
-                    # Skip adding AI messages to avoid confusion
-                    pass
-            
-            # Add current message (only once!)
-            messages.append(HumanMessage(content=message))
-            
-            logger.debug(f"Sending {len(messages)} messages to LangChain ChatOpenAI")
-            logger.debug(f"System prompt: {system_prompt[:100]}...")
-            logger.debug(f"User message: {message}")
-            
-            # Call LangChain ChatOpenAI
-            response = await self.llm.ainvoke(messages)
-            
-            ai_response = response.content.strip()
-            logger.debug(f"Received response from LangChain: '{ai_response[:100]}...'")
+            # Call OpenAI
+            ai_response = await self._invoke_llm(self._select_llm(message, messages), messages)
+            logger.debug("Received response from OpenAI: '%s...'", ai_response[:100])
             
             return ai_response
-            
+        
+        except LLMCapacityError:
+            raise
+        
         except Exception as e:
-            logger.error(f"LangChain ChatOpenAI error: {str(e)}", exc_info=True)
+            logger.error("OpenAI chat completion error: %s", e, exc_info=True)
             raise Exception(f"Failed to generate AI response: {str(e)}")
-
-    def get_session_history(self, session_id: str) -> List[Dict]:
+    
+    def _select_llm(self, message: str, messages: List) -> Dict[str, Any]:
+        """Route short messages early in a conversation to the fast model"""
+        prior_turns = len(messages) - 2  # Excluding the system prompt and the current message
+        if len(message) < FAST_MODEL_MAX_MESSAGE_CHARS and prior_turns < FAST_MODEL_MAX_HISTORY:
+            logger.debug("Routing to fast model: %s", self.llm_fast["model"])
+            return self.llm_fast
+        return self.llm
+    
+    async def _invoke_llm(self, llm: Dict[str, Any], messages: List) -> str:
+        """Invoke the LLM, serving repeated prompts from the cache and sharing a single call between identical concurrent prompts"""
+        key = (llm["model"], tuple((msg["role"], msg["content"]) for msg in messages))
+        cache_key = _response_cache_key(*key)
+        
+        cached = await _get_cached_response(cache_key)
+        if cached is not None:
+            logger.debug("Serving AI response from cache")
+            return cached
+        
+        task = self.inflight_calls.get(key)
+        if task is None:
+            task = asyncio.create_task(self._invoke_llm_uncoalesced(llm, messages, cache_key))
+            self.inflight_calls[key] = task
+            task.add_done_callback(lambda _: self.inflight_calls.pop(key, None))
+        else:
+            logger.debug("Joining in-flight LLM call for identical prompt")
+        
+        # Shield so one caller disconnecting doesn't cancel the call for the others
+        return await asyncio.shield(task)
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_random_exponential(multiplier=0.3, max=4),
+        retry=retry_if_exception_type(RETRYABLE_LLM_ERRORS),
+        reraise=True
+    )
+    async def _invoke_llm_uncoalesced(self, llm: Dict[str, Any], messages: List, cache_key: str) -> str:
+        await _acquire_llm_slot()
+        try:
+            response = await self.client.chat.completions.create(messages=messages, **llm)
+        finally:
+            LLM_SEM.release()
+        
+        ai_response = response.choices[0].message.content.strip()
+        await _set_cached_response(cache_key, ai_response)
+        return ai_response
+    
+    async def _stream_ai_response(self, message: str, org_type: OrganizationType, session_id: str) -> AsyncIterator[str]:
+        """Stream AI response chunks from OpenAI as they arrive"""
+        logger.debug("Streaming AI response for org type: %s, session: %s", org_type, session_id)
+        
+        try:
+            messages = await self._build_messages(message, org_type, session_id)
+            
+            # Hold the slot for the whole stream
+            await _acquire_llm_slot()
+            try:
+                stream = await self.client.chat.completions.create(
+                    messages=messages,
+                    stream=True,
+                    **self._select_llm(message, messages)
+                )
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                LLM_SEM.release()
+        
+        except LLMCapacityError:
+            raise
+        
+        except Exception as e:
+            logger.error("OpenAI streaming error: %s", e, exc_info=True)
+            raise Exception(f"Failed to stream AI response: {str(e)}")
+    
+    async def get_session_history(self, session_id: str) -> List[Dict]:
         """Get conversation history for a session"""
-        logger.debug(f"Getting history for session: {session_id}")
-        return self.session_manager.get_conversation_history(session_id)
-
-    def clear_session_memory(self, session_id: str) -> bool:
+        logger.debug("Getting history for session: %s", session_id)
+        return list(await self.session_manager.get_conversation_history(session_id))
+    
+    async def clear_session_memory(self, session_id: str) -> bool:
         """Clear conversation history for a session"""
-        logger.debug(f"Clearing memory for session: {session_id}")
-        return self.session_manager.clear_session(session_id)
\ No newline at end of file
+        logger.debug("Clearing memory for session: %s", session_id)
+        return await self.session_manager.clear_session(session_id)
\ No newline at end of file
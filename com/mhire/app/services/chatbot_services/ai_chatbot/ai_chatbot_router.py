@@ -1,14 +1,24 @@
 import time
+import orjson
 import logging
+from contextlib import asynccontextmanager
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from fastapi.exceptions import RequestValidationError
-from com.mhire.app.common.network_responses import NetworkResponse, HTTPCode
+from com.mhire.app.common.network_responses import NetworkResponse, HTTPCode, ORJSONResponse
 from com.mhire.app.services.chatbot_services.ai_chatbot.ai_chatbot_schema import ChatRequest, ChatResponse
-from com.mhire.app.services.chatbot_services.ai_chatbot.ai_chatbot import AIChatbot
+from com.mhire.app.services.chatbot_services.ai_chatbot.ai_chatbot import AIChatbot, LLMCapacityError, http_async_client
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/v1", tags=["AI Chatbot"])
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Release pooled OpenAI connections on shutdown
+    await http_async_client.aclose()
+    logger.info("Closed OpenAI HTTP client")
+
+router = APIRouter(prefix="/api/v1", tags=["AI Chatbot"], default_response_class=ORJSONResponse, lifespan=lifespan)
 network_response = NetworkResponse()
 
 # Initialize chatbot instance
@@ -28,50 +38,20 @@ async def chat_endpoint(http_request: Request, request: ChatRequest):
     """
     start_time = time.time()
     
-    logger.info(f"=== CHAT REQUEST START ===")
-    logger.info(f"Message: '{request.message}'")
-    logger.info(f"Organization Type: {request.organization_type}")
-    logger.info(f"Session ID: {request.session_id}")
+    logger.info("=== CHAT REQUEST START ===")
+    logger.info("Message: '%s'", request.message)
+    logger.info("Organization Type: %s", request.organization_type)
+    logger.info("Session ID: %s", request.session_id)
     
     try:
-        # Enhanced validation
-        if not request.message or not request.message.strip():
-            logger.warning("Empty message received")
-            return network_response.json_response(
-                http_code=HTTPCode.BAD_REQUEST,
-                error_message="Message cannot be empty",
-                resource=http_request.url.path,
-                start_time=start_time
-            )
-        
-        # Check message length
-        if len(request.message) > 4000:  # Reasonable limit for chat messages
-            logger.warning(f"Message too long: {len(request.message)} characters")
-            return network_response.json_response(
-                http_code=HTTPCode.PAYLOAD_TOO_LARGE,
-                error_message="Message is too long. Maximum 4000 characters allowed.",
-                resource=http_request.url.path,
-                start_time=start_time
-            )
-        
-        # Validate organization type
-        if not request.organization_type:
-            logger.warning("Missing organization type")
-            return network_response.json_response(
-                http_code=HTTPCode.BAD_REQUEST,
-                error_message="Organization type is required",
-                resource=http_request.url.path,
-                start_time=start_time
-            )
-        
         logger.debug("Processing message with chatbot instance...")
         
         # Process the message
         response: ChatResponse = await chatbot_instance.process_message(request)
         
-        logger.info(f"Generated response for session {response.session_id}")
-        logger.info(f"Escalation Type: {response.escalation_type}")
-        logger.info(f"Response: '{response.response[:100]}...'")
+        logger.info("Generated response for session %s", response.session_id)
+        logger.info("Escalation Type: %s", response.escalation_type)
+        logger.info("Response: '%s...'", response.response[:100])
         
         # Convert response to dict for API response (removed tags and appointment_questions)
         response_data = {
@@ -84,7 +64,7 @@ async def chat_endpoint(http_request: Request, request: ChatRequest):
         }
         
         logger.debug("Returning successful response")
-        logger.info(f"=== CHAT REQUEST END ===")
+        logger.info("=== CHAT REQUEST END ===")
         
         return network_response.success_response(
             http_code=HTTPCode.SUCCESS,
@@ -97,8 +77,8 @@ async def chat_endpoint(http_request: Request, request: ChatRequest):
     # RequestValidationError is now handled globally in main.py
         
     except HTTPException as he:
-        logger.error(f"HTTP Exception: {he.detail}")
-        logger.info(f"=== CHAT REQUEST END (HTTP ERROR) ===")
+        logger.error("HTTP Exception: %s", he.detail)
+        logger.info("=== CHAT REQUEST END (HTTP ERROR) ===")
         
         return network_response.json_response(
             http_code=he.status_code,
@@ -108,8 +88,8 @@ async def chat_endpoint(http_request: Request, request: ChatRequest):
         )
         
     except ValueError as ve:
-        logger.error(f"Validation error: {str(ve)}")
-        logger.info(f"=== CHAT REQUEST END (VALIDATION ERROR) ===")
+        logger.error("Validation error: %s", ve)
+        logger.info("=== CHAT REQUEST END (VALIDATION ERROR) ===")
         return network_response.json_response(
             http_code=HTTPCode.UNPROCESSABLE_ENTITY,
             error_message=f"Validation error: {str(ve)}",
@@ -118,8 +98,8 @@ async def chat_endpoint(http_request: Request, request: ChatRequest):
         )
     
     except ConnectionError as ce:
-        logger.error(f"Connection error (likely OpenAI API): {str(ce)}")
-        logger.info(f"=== CHAT REQUEST END (CONNECTION ERROR) ===")
+        logger.error("Connection error (likely OpenAI API): %s", ce)
+        logger.info("=== CHAT REQUEST END (CONNECTION ERROR) ===")
         return network_response.json_response(
             http_code=HTTPCode.SERVICE_UNAVAILABLE,
             error_message="AI service is temporarily unavailable. Please try again later.",
@@ -127,9 +107,19 @@ async def chat_endpoint(http_request: Request, request: ChatRequest):
             start_time=start_time
         )
     
+    except LLMCapacityError as le:
+        logger.warning("LLM capacity error: %s", le)
+        logger.info("=== CHAT REQUEST END (CAPACITY ERROR) ===")
+        return network_response.json_response(
+            http_code=HTTPCode.SERVICE_UNAVAILABLE,
+            error_message="AI service is busy. Please try again shortly.",
+            resource=http_request.url.path,
+            start_time=start_time
+        )
+    
     except TimeoutError as te:
-        logger.error(f"Timeout error: {str(te)}")
-        logger.info(f"=== CHAT REQUEST END (TIMEOUT ERROR) ===")
+        logger.error("Timeout error: %s", te)
+        logger.info("=== CHAT REQUEST END (TIMEOUT ERROR) ===")
         return network_response.json_response(
             http_code=HTTPCode.GATEWAY_TIMEOUT,
             error_message="Request timed out. Please try again with a shorter message.",
@@ -138,8 +128,8 @@ async def chat_endpoint(http_request: Request, request: ChatRequest):
         )
     
     except MemoryError as me:
-        logger.error(f"Memory error: {str(me)}")
-        logger.info(f"=== CHAT REQUEST END (MEMORY ERROR) ===")
+        logger.error("Memory error: %s", me)
+        logger.info("=== CHAT REQUEST END (MEMORY ERROR) ===")
         return network_response.json_response(
             http_code=HTTPCode.INTERNAL_SERVER_ERROR,
             error_message="Server is experiencing high load. Please try again later.",
@@ -148,11 +138,32 @@ async def chat_endpoint(http_request: Request, request: ChatRequest):
         )
         
     except Exception as e:
-        logger.error(f"Unexpected error in chat endpoint: {str(e)}", exc_info=True)
-        logger.info(f"=== CHAT REQUEST END (SYSTEM ERROR) ===")
+        logger.error("Unexpected error in chat endpoint: %s", e, exc_info=True)
+        logger.info("=== CHAT REQUEST END (SYSTEM ERROR) ===")
         return network_response.json_response(
             http_code=HTTPCode.INTERNAL_SERVER_ERROR,
             error_message="An unexpected error occurred. Please try again later.",
             resource=http_request.url.path,
             start_time=start_time
-        )
\ No newline at end of file
+        )
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Streaming chat endpoint for AI chatbot (server-sent events)
+    
+    Accepts the same request body as /chat. Each event's data is a JSON object:
+    - type "token": a chunk of the AI response as it is generated
+    - type "response": the final response, with the same fields as /chat returns
+    """
+    logger.info("=== CHAT STREAM REQUEST START ===")
+    logger.info("Message: '%s'", request.message)
+    logger.info("Organization Type: %s", request.organization_type)
+    logger.info("Session ID: %s", request.session_id)
+    
+    async def event_stream():
+        async for event in chatbot_instance.stream_message(request):
+            yield f"data: {orjson.dumps(event).decode()}\n\n"
+        logger.info("=== CHAT STREAM REQUEST END ===")
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
\ No newline at end of file
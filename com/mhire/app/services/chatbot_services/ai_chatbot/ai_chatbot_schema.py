@@ -1,13 +1,18 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from collections import deque
+from dataclasses import dataclass, field
+from pydantic import BaseModel, ConfigDict, StringConstraints
+from typing import Optional, Dict, Any, Deque, Annotated
 from enum import Enum
 
+MAX_HISTORY_MESSAGES = 20
+MAX_MESSAGE_LENGTH = 4000  # Reasonable limit for chat messages
+
 class OrganizationType(str, Enum):
     HRH = "HRH"
     SMB = "SMB"
 
 class ChatRequest(BaseModel):
-    message: str
+    message: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=MAX_MESSAGE_LENGTH)]
     organization_type: OrganizationType = OrganizationType.SMB
     session_id: Optional[str] = None
 
@@ -16,19 +21,25 @@ class EscalationType(str, Enum):
     HUMAN = "human_escalation"
     APPOINTMENT = "appointment_booking"
 
-class AppointmentState(BaseModel):
+# Internal session state is never validated, so plain slotted dataclasses are enough
+@dataclass(slots=True)
+class AppointmentState:
     """Tracks appointment booking progress"""
     is_booking: bool = False
     current_question: int = 0
-    answers: Dict[str, str] = {}
-    
-class SessionData(BaseModel):
+    answers: Dict[str, str] = field(default_factory=dict)
+
+@dataclass(slots=True)
+class SessionData:
     """Session data structure"""
     session_id: str
-    appointment_state: AppointmentState = AppointmentState()
-    conversation_history: List[Dict[str, str]] = []
+    appointment_state: AppointmentState = field(default_factory=AppointmentState)
+    # Bounded so appends evict the oldest message instead of growing or re-slicing
+    conversation_history: Deque[Dict[str, str]] = field(default_factory=lambda: deque(maxlen=MAX_HISTORY_MESSAGES))
 
 class ChatResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     response: str
     escalation_type: EscalationType
     human_escalation: bool = False
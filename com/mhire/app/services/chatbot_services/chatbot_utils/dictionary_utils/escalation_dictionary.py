@@ -1,40 +1,48 @@
 import logging
+from com.mhire.app.services.chatbot_services.chatbot_utils.dictionary_utils.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
 # Human escalation keywords - urgent medical situations
-HUMAN_ESCALATION_KEYWORDS = [
+HUMAN_ESCALATION_KEYWORDS = (
     "urgent", "help", "real person", "live agent", "chest pain", 
     "continuous bleeding", "severe bleeding", "can't breathe", 
     "difficulty breathing", "unconscious", "emergency", "911",
     "severe pain", "heart attack", "stroke", "allergic reaction",
     "overdose", "suicide", "self harm", "major injury", "trauma",
     "severe headache", "vision loss", "paralysis", "seizure"
-]
+)
 
 # Appointment escalation keywords - scheduling related
-APPOINTMENT_ESCALATION_KEYWORDS = [
+APPOINTMENT_ESCALATION_KEYWORDS = (
     "book", "schedule", "doctor", "consult", "appointment",
     "visit", "see a doctor", "clinic", "booking", "available",
     "when can i", "make appointment", "schedule visit",
     "book appointment", "see physician", "consultation"
-]
+)
+
+# Both keyword lists compiled into one automaton, so a message is scanned once
+ESCALATION_MATCHER = KeywordMatcher({
+    "human": HUMAN_ESCALATION_KEYWORDS,
+    "appointment": APPOINTMENT_ESCALATION_KEYWORDS
+})
 
 def check_escalation_keywords(message: str) -> tuple[bool, bool]:
     """
     Check if message contains escalation keywords
     Returns: (human_escalation, appointment_escalation)
     """
-    logger.debug(f"Checking escalation keywords for message: {message[:50]}...")
+    logger.debug("Checking escalation keywords for message: %s...", message[:50])
     
     message_lower = message.lower()
+    matched = ESCALATION_MATCHER.match_categories(message_lower)
     
     # Check for human escalation first (higher priority)
-    human_escalation = any(keyword in message_lower for keyword in HUMAN_ESCALATION_KEYWORDS)
-    logger.debug(f"Human escalation detected: {human_escalation}")
+    human_escalation = "human" in matched
+    logger.debug("Human escalation detected: %s", human_escalation)
     
     # Check for appointment escalation
-    appointment_escalation = any(keyword in message_lower for keyword in APPOINTMENT_ESCALATION_KEYWORDS)
-    logger.debug(f"Appointment escalation detected: {appointment_escalation}")
+    appointment_escalation = "appointment" in matched
+    logger.debug("Appointment escalation detected: %s", appointment_escalation)
     
     return human_escalation, appointment_escalation
\ No newline at end of file
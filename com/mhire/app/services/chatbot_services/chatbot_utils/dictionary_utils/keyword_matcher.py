@@ -0,0 +1,31 @@
+import logging
+from typing import Dict, Iterable, Set
+import ahocorasick
+
+logger = logging.getLogger(__name__)
+
+class KeywordMatcher:
+    """Finds which keyword categories occur in a text with a single Aho-Corasick pass
+    
+    Keywords are stored lowercase, so texts should be lowercased before matching.
+    """
+    
+    def __init__(self, keywords_by_category: Dict[str, Iterable[str]]):
+        self.automaton = ahocorasick.Automaton()
+        self.categories = frozenset(keywords_by_category)
+        for category, keywords in keywords_by_category.items():
+            for keyword in map(str.lower, keywords):
+                # A keyword may belong to more than one category
+                categories = self.automaton.get(keyword, ())
+                self.automaton.add_word(keyword, categories + (category,))
+        self.automaton.make_automaton()
+        logger.debug("KeywordMatcher built with %s keywords", len(self.automaton))
+    
+    def match_categories(self, text: str) -> Set[str]:
+        """Get the categories of all keywords occurring as substrings of text"""
+        found = set()
+        for _, categories in self.automaton.iter(text):
+            found.update(categories)
+            if len(found) == len(self.categories):
+                break  # Every category matched, the rest of the text can't add anything
+        return found
\ No newline at end of file
@@ -40,11 +40,12 @@ Your role is to:
 4. Maintain a caring, approachable communication style
 """
 
+SYSTEM_PROMPTS = {
+    OrganizationType.HRH: HRH_SYSTEM_PROMPT,
+    OrganizationType.SMB: SMB_SYSTEM_PROMPT
+}
+
 def get_system_prompt(org_type: OrganizationType) -> str:
     """Get system prompt based on organization type"""
-    logger.debug(f"Getting system prompt for organization type: {org_type}")
-    
-    if org_type == OrganizationType.HRH:
-        return HRH_SYSTEM_PROMPT
-    else:
-        return SMB_SYSTEM_PROMPT
\ No newline at end of file
+    logger.debug("Getting system prompt for organization type: %s", org_type)
+    return SYSTEM_PROMPTS.get(org_type, SMB_SYSTEM_PROMPT)
\ No newline at end of file
@@ -1,70 +1,139 @@
+import json
 import logging
-import uuid
-from typing import Dict, Optional
-from com.mhire.app.services.chatbot_services.ai_chatbot.ai_chatbot_schema import SessionData, AppointmentState
+import secrets
+from dataclasses import asdict
+from typing import Dict, Optional, Sequence
+from cachetools import TTLCache
+from com.mhire.app.common.redis_client import redis_client
+from com.mhire.app.services.chatbot_services.ai_chatbot.ai_chatbot_schema import SessionData, AppointmentState, MAX_HISTORY_MESSAGES
 
 logger = logging.getLogger(__name__)
 
+SESSION_TTL_SECONDS = 1800
+MAX_IN_MEMORY_SESSIONS = 10_000
+
 class SessionManager:
-    """Manages session data in memory"""
+    """Manages session data in Redis when configured, otherwise in memory"""
     
-    def __init__(self):
-        self.sessions: Dict[str, SessionData] = {}
-        logger.debug("SessionManager initialized")
+    def __init__(self, namespace: str = "chat"):
+        # Namespace keeps Redis keys of separate managers apart, as separate in-memory instances are
+        self.namespace = namespace
+        self.redis = redis_client
+        # Bounded like the Redis store: idle sessions expire, and the least recently used go first when full
+        self.sessions: TTLCache = TTLCache(maxsize=MAX_IN_MEMORY_SESSIONS, ttl=SESSION_TTL_SECONDS)
+        logger.debug("SessionManager initialized (%s, namespace: %s)", "redis" if self.redis else "in-memory", namespace)
     
+    @staticmethod
     def generate_session_id() -> str:
         """Generate a unique session ID"""
-        session_id = str(uuid.uuid4())
-        logger.debug(f"Generated session ID: {session_id}")
+        session_id = secrets.token_hex(16)
+        logger.debug("Generated session ID: %s", session_id)
         return session_id
     
-    def get_session(self, session_id: str) -> SessionData:
+    def _session_key(self, session_id: str) -> str:
+        return f"{self.namespace}:sess:{session_id}"
+    
+    def _history_key(self, session_id: str) -> str:
+        return f"{self.namespace}:hist:{session_id}"
+    
+    async def get_session(self, session_id: str) -> SessionData:
         """Get or create session data"""
-        if session_id not in self.sessions:
-            logger.debug(f"Creating new session: {session_id}")
-            self.sessions[session_id] = SessionData(
+        if self.redis is None:
+            session_data = self.sessions.get(session_id)
+            if session_data is None:
+                logger.debug("Creating new session: %s", session_id)
+                session_data = SessionData(
+                    session_id=session_id,
+                    appointment_state=AppointmentState()
+                )
+            else:
+                logger.debug("Retrieved existing session: %s", session_id)
+            
+            # Re-inserting restarts the TTL, as every access does for the Redis keys
+            self.sessions[session_id] = session_data
+            return session_data
+        
+        # In Redis the history is kept in its own list; use get_conversation_history to read it
+        raw = await self.redis.get(self._session_key(session_id))
+        if raw is None:
+            logger.debug("Creating new session: %s", session_id)
+            session_data = SessionData(
                 session_id=session_id,
-                appointment_state=AppointmentState(),
-                conversation_history=[]
+                appointment_state=AppointmentState()
             )
+            await self.update_session(session_id, session_data)
         else:
-            logger.debug(f"Retrieved existing session: {session_id}")
+            logger.debug("Retrieved existing session: %s", session_id)
+            data = json.loads(raw)
+            session_data = SessionData(
+                session_id=data["session_id"],
+                appointment_state=AppointmentState(**data["appointment_state"])
+            )
         
-        return self.sessions[session_id]
+        return session_data
     
-    def update_session(self, session_id: str, session_data: SessionData):
+    async def update_session(self, session_id: str, session_data: SessionData):
         """Update session data"""
-        self.sessions[session_id] = session_data
-        logger.debug(f"Updated session: {session_id}")
+        if self.redis is None:
+            self.sessions[session_id] = session_data
+        else:
+            await self.redis.set(
+                self._session_key(session_id),
+                json.dumps({
+                    "session_id": session_data.session_id,
+                    "appointment_state": asdict(session_data.appointment_state)
+                }),
+                ex=SESSION_TTL_SECONDS
+            )
+        logger.debug("Updated session: %s", session_id)
     
-    def add_message_to_history(self, session_id: str, message_type: str, content: str):
+    async def add_message_to_history(self, session_id: str, message_type: str, content: str):
         """Add message to conversation history"""
-        session = self.get_session(session_id)
-        session.conversation_history.append({
+        message = {
             "type": message_type,
             "content": content
-        })
+        }
         
-        # Keep only last 20 messages to avoid memory issues
-        if len(session.conversation_history) > 20:
-            session.conversation_history = session.conversation_history[-20:]
+        if self.redis is None:
+            # The deque keeps only the last MAX_HISTORY_MESSAGES messages
+            session = await self.get_session(session_id)
+            session.conversation_history.append(message)
+        else:
+            # Append, trim and refresh TTLs in a single round-trip
+            history_key = self._history_key(session_id)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.rpush(history_key, json.dumps(message))
+                pipe.ltrim(history_key, -MAX_HISTORY_MESSAGES, -1)
+                pipe.expire(history_key, SESSION_TTL_SECONDS)
+                pipe.expire(self._session_key(session_id), SESSION_TTL_SECONDS)
+                await pipe.execute()
         
-        logger.debug(f"Added {message_type} message to session {session_id}")
+        logger.debug("Added %s message to session %s", message_type, session_id)
     
-    def get_conversation_history(self, session_id: str) -> list:
+    async def get_conversation_history(self, session_id: str) -> Sequence[Dict[str, str]]:
         """Get conversation history for a session"""
-        session = self.get_session(session_id)
-        return session.conversation_history
+        if self.redis is None:
+            session = await self.get_session(session_id)
+            return session.conversation_history
+        
+        messages = await self.redis.lrange(self._history_key(session_id), 0, -1)
+        return [json.loads(message) for message in messages]
     
-    def clear_session(self, session_id: str) -> bool:
+    async def clear_session(self, session_id: str) -> bool:
         """Clear session data"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-            logger.debug(f"Cleared session: {session_id}")
-            return True
-        return False
+        if self.redis is None:
+            if session_id in self.sessions:
+                del self.sessions[session_id]
+                logger.debug("Cleared session: %s", session_id)
+                return True
+            return False
+        
+        deleted = await self.redis.delete(self._session_key(session_id), self._history_key(session_id))
+        if deleted:
+            logger.debug("Cleared session: %s", session_id)
+        return deleted > 0
     
-    def is_in_appointment_booking(self, session_id: str) -> bool:
+    async def is_in_appointment_booking(self, session_id: str) -> bool:
         """Check if session is currently in appointment booking mode"""
-        session = self.get_session(session_id)
+        session = await self.get_session(session_id)
         return session.appointment_state.is_booking
\ No newline at end of file
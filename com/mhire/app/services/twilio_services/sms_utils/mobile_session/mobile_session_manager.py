@@ -1,25 +1,33 @@
+import functools
 import logging
 import hashlib
-from typing import Dict, Optional
-from com.mhire.app.services.chatbot_services.chatbot_utils.session_utils.session_manager import SessionManager
+import re
+from cachetools import LRUCache
+from com.mhire.app.services.chatbot_services.chatbot_utils.session_utils.session_manager import SessionManager, MAX_IN_MEMORY_SESSIONS
 
 logger = logging.getLogger(__name__)
 
+_NON_E164 = re.compile(r'[^\d+]')
+_NON_DIGIT = re.compile(r'\D')
+
 class MobileSessionManager:
     """Manages sessions based on mobile numbers for SMS conversations"""
     
     def __init__(self):
-        self.mobile_to_session: Dict[str, str] = {}  # mobile_number -> session_id mapping
-        self.session_manager = SessionManager()
+        # mobile_number -> session_id mapping; IDs are derived from the number, so an evicted entry is simply recomputed
+        self.mobile_to_session: LRUCache = LRUCache(maxsize=MAX_IN_MEMORY_SESSIONS)
+        self.session_manager = SessionManager(namespace="mobile")
         logger.debug("MobileSessionManager initialized")
     
-    def _normalize_mobile_number(self, mobile_number: str) -> str:
-        """Normalize mobile number format"""
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
+    def _normalize_mobile_number(mobile_number: str) -> str:
+        """Normalize mobile number format (cached, the same numbers recur on every message)"""
         # Remove all non-digit characters except +
-        cleaned = ''.join(char for char in mobile_number if char.isdigit() or char == '+')
+        cleaned = _NON_E164.sub('', mobile_number)
         
         # Remove + for processing
-        digits_only = cleaned.replace('+', '')
+        digits_only = _NON_DIGIT.sub('', cleaned)
         
         # Normalize to E.164 format
         if len(digits_only) == 10:
@@ -35,7 +43,7 @@ class MobileSessionManager:
             # Default to US country code
             normalized = '+1' + digits_only
         
-        logger.debug(f"Normalized mobile number: {mobile_number} -> {normalized}")
+        logger.debug("Normalized mobile number: %s -> %s", mobile_number, normalized)
         return normalized
     
     def _generate_mobile_session_id(self, mobile_number: str) -> str:
@@ -43,68 +51,82 @@ class MobileSessionManager:
         normalized_number = self._normalize_mobile_number(mobile_number)
         
         # Extract digits only for the session ID (remove + and country code formatting)
-        digits_only = ''.join(char for char in normalized_number if char.isdigit())
+        digits_only = _NON_DIGIT.sub('', normalized_number)
         
         # Create a hash of the mobile number for consistent session ID
-        hash_object = hashlib.md5(normalized_number.encode())
-        hash_part = hash_object.hexdigest()[:16]
+        # Identifier only, so a fast 8-byte blake2b digest replaces truncated md5 (same 16 hex chars)
+        hash_part = hashlib.blake2b(normalized_number.encode(), digest_size=8).hexdigest()
         
         # Format: {phone_digits}_{hash}
         session_id = f"{digits_only}_{hash_part}"
         
-        logger.debug(f"Generated mobile session ID: {session_id} for {normalized_number}")
+        logger.debug("Generated mobile session ID: %s for %s", session_id, normalized_number)
         return session_id
     
-    def get_or_create_session_for_mobile(self, mobile_number: str) -> str:
+    async def get_or_create_session_for_mobile(self, mobile_number: str) -> str:
         """Get existing session ID or create new one for mobile number"""
         normalized_number = self._normalize_mobile_number(mobile_number)
         
         if normalized_number in self.mobile_to_session:
             session_id = self.mobile_to_session[normalized_number]
-            logger.debug(f"Retrieved existing session {session_id} for {normalized_number}")
+            logger.debug("Retrieved existing session %s for %s", session_id, normalized_number)
         else:
             session_id = self._generate_mobile_session_id(normalized_number)
             self.mobile_to_session[normalized_number] = session_id
-            logger.debug(f"Created new session {session_id} for {normalized_number}")
+            logger.debug("Created new session %s for %s", session_id, normalized_number)
         
         # Ensure session exists in session manager
-        self.session_manager.get_session(session_id)
+        await self.session_manager.get_session(session_id)
         
         return session_id
     
-    def get_session_data(self, mobile_number: str):
+    async def get_session_data(self, mobile_number: str):
         """Get session data for mobile number"""
-        session_id = self.get_or_create_session_for_mobile(mobile_number)
-        return self.session_manager.get_session(session_id)
+        session_id = await self.get_or_create_session_for_mobile(mobile_number)
+        return await self.session_manager.get_session(session_id)
     
-    def add_message_to_mobile_session(self, mobile_number: str, message_type: str, content: str):
+    async def add_message_to_mobile_session(self, mobile_number: str, message_type: str, content: str):
         """Add message to mobile number's session history"""
-        session_id = self.get_or_create_session_for_mobile(mobile_number)
-        self.session_manager.add_message_to_history(session_id, message_type, content)
-        logger.debug(f"Added {message_type} message to mobile session for {mobile_number}")
+        session_id = await self.get_or_create_session_for_mobile(mobile_number)
+        await self.add_message_by_session_id(session_id, message_type, content)
     
-    def get_mobile_conversation_history(self, mobile_number: str) -> list:
+    async def get_mobile_conversation_history(self, mobile_number: str) -> list:
         """Get conversation history for mobile number"""
-        session_id = self.get_or_create_session_for_mobile(mobile_number)
-        return self.session_manager.get_conversation_history(session_id)
+        session_id = await self.get_or_create_session_for_mobile(mobile_number)
+        return await self.get_conversation_history_by_session_id(session_id)
     
-    def is_mobile_in_appointment_booking(self, mobile_number: str) -> bool:
+    async def is_mobile_in_appointment_booking(self, mobile_number: str) -> bool:
         """Check if mobile number session is in appointment booking mode"""
-        session_id = self.get_or_create_session_for_mobile(mobile_number)
-        return self.session_manager.is_in_appointment_booking(session_id)
+        session_id = await self.get_or_create_session_for_mobile(mobile_number)
+        return await self.session_manager.is_in_appointment_booking(session_id)
+    
+    # Variants taking a session ID already resolved with get_or_create_session_for_mobile
+    
+    async def add_message_by_session_id(self, session_id: str, message_type: str, content: str):
+        """Add message to a mobile session's history"""
+        await self.session_manager.add_message_to_history(session_id, message_type, content)
+        logger.debug("Added %s message to mobile session %s", message_type, session_id)
+    
+    async def get_conversation_history_by_session_id(self, session_id: str) -> list:
+        """Get conversation history for a mobile session"""
+        return list(await self.session_manager.get_conversation_history(session_id))
+    
+    async def is_in_appointment_booking_by_session_id(self, session_id: str) -> bool:
+        """Check if a mobile session is in appointment booking mode"""
+        return await self.session_manager.is_in_appointment_booking(session_id)
     
-    def clear_mobile_session(self, mobile_number: str) -> bool:
+    async def clear_mobile_session(self, mobile_number: str) -> bool:
         """Clear session for mobile number"""
         normalized_number = self._normalize_mobile_number(mobile_number)
         
         if normalized_number in self.mobile_to_session:
             session_id = self.mobile_to_session[normalized_number]
             del self.mobile_to_session[normalized_number]
-            self.session_manager.clear_session(session_id)
-            logger.debug(f"Cleared mobile session for {normalized_number}")
+            await self.session_manager.clear_session(session_id)
+            logger.debug("Cleared mobile session for %s", normalized_number)
             return True
         return False
     
-    def get_mobile_session_id(self, mobile_number: str) -> str:
+    async def get_mobile_session_id(self, mobile_number: str) -> str:
         """Get the session ID for a mobile number without creating session data"""
-        return self.get_or_create_session_for_mobile(mobile_number)
\ No newline at end of file
+        return await self.get_or_create_session_for_mobile(mobile_number)
\ No newline at end of file
@@ -1,15 +1,23 @@
 import logging
+from collections import defaultdict, deque
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from itertools import islice
+from typing import List, Dict, Optional, Deque
 from com.mhire.app.services.twilio_services.twilio_sms.twilio_sms_schema import WebhookLogEntry, MessageStatus
 
 logger = logging.getLogger(__name__)
 
+MAX_WEBHOOK_LOGS = 1000  # Keep only the last 1000 logs to prevent memory issues
+
 class WebhookLogManager:
     """Manages webhook logs in memory"""
     
     def __init__(self):
-        self.webhook_logs: List[Dict[str, Any]] = []
+        # Appending past maxlen evicts the oldest log in O(1)
+        self.webhook_logs: Deque[WebhookLogEntry] = deque(maxlen=MAX_WEBHOOK_LOGS)
+        # Per-status and per-number indexes, evicted in step with webhook_logs
+        self.logs_by_status: Dict[MessageStatus, Deque[WebhookLogEntry]] = defaultdict(deque)
+        self.logs_by_number: Dict[str, Deque[WebhookLogEntry]] = defaultdict(deque)
         logger.debug("WebhookLogManager initialized")
     
     def add_webhook_log(
@@ -22,106 +30,73 @@ class WebhookLogManager:
         error_message: Optional[str] = None
     ):
         """Add a webhook log entry"""
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "message_sid": message_sid,
-            "status": status.value,
-            "from_number": from_number,
-            "to_number": to_number,
-            "error_code": error_code,
-            "error_message": error_message
-        }
+        # Stored in final form, so reads return the same entries without rebuilding them
+        log_entry = WebhookLogEntry(
+            timestamp=datetime.now().isoformat(),
+            message_sid=message_sid,
+            status=status,
+            from_number=from_number,
+            to_number=to_number,
+            error_code=error_code,
+            error_message=error_message
+        )
         
+        if len(self.webhook_logs) == MAX_WEBHOOK_LOGS:
+            # The log about to be evicted is also the oldest one in each of its indexes
+            self._unindex(self.webhook_logs[0])
         self.webhook_logs.append(log_entry)
+        self.logs_by_status[log_entry.status].append(log_entry)
+        for number in self._numbers(log_entry):
+            self.logs_by_number[number].append(log_entry)
         
-        # Keep only last 1000 logs to prevent memory issues
-        if len(self.webhook_logs) > 1000:
-            self.webhook_logs = self.webhook_logs[-1000:]
-        
-        logger.debug(f"Added webhook log for message {message_sid} with status {status.value}")
+        logger.debug("Added webhook log for message %s with status %s", message_sid, status.value)
+    
+    @staticmethod
+    def _numbers(log: WebhookLogEntry) -> set:
+        """Numbers a log is indexed under (from and to, once if they are the same)"""
+        return {log.from_number, log.to_number}
+    
+    @staticmethod
+    def _pop_oldest(index: Dict[str, Deque[WebhookLogEntry]], key: str):
+        """Drop the oldest log of an index bucket, removing the bucket once empty"""
+        bucket = index[key]
+        bucket.popleft()
+        if not bucket:
+            del index[key]
+    
+    def _unindex(self, log: WebhookLogEntry):
+        """Drop the oldest log from the status and number indexes"""
+        self._pop_oldest(self.logs_by_status, log.status)
+        for number in self._numbers(log):
+            self._pop_oldest(self.logs_by_number, number)
     
     def get_all_logs(self) -> List[WebhookLogEntry]:
         """Get all webhook logs"""
-        return [
-            WebhookLogEntry(
-                timestamp=log["timestamp"],
-                message_sid=log["message_sid"],
-                status=MessageStatus(log["status"]),
-                from_number=log["from_number"],
-                to_number=log["to_number"],
-                error_code=log.get("error_code"),
-                error_message=log.get("error_message")
-            )
-            for log in self.webhook_logs
-        ]
+        return list(self.webhook_logs)
     
     def get_logs_by_status(self, status: MessageStatus) -> List[WebhookLogEntry]:
         """Get logs filtered by status"""
-        filtered_logs = [log for log in self.webhook_logs if log["status"] == status.value]
-        return [
-            WebhookLogEntry(
-                timestamp=log["timestamp"],
-                message_sid=log["message_sid"],
-                status=MessageStatus(log["status"]),
-                from_number=log["from_number"],
-                to_number=log["to_number"],
-                error_code=log.get("error_code"),
-                error_message=log.get("error_message")
-            )
-            for log in filtered_logs
-        ]
+        return list(self.logs_by_status.get(status, ()))
     
     def get_logs_by_number(self, phone_number: str) -> List[WebhookLogEntry]:
         """Get logs for a specific phone number (from or to)"""
-        filtered_logs = [
-            log for log in self.webhook_logs 
-            if log["from_number"] == phone_number or log["to_number"] == phone_number
-        ]
-        return [
-            WebhookLogEntry(
-                timestamp=log["timestamp"],
-                message_sid=log["message_sid"],
-                status=MessageStatus(log["status"]),
-                from_number=log["from_number"],
-                to_number=log["to_number"],
-                error_code=log.get("error_code"),
-                error_message=log.get("error_message")
-            )
-            for log in filtered_logs
-        ]
+        return list(self.logs_by_number.get(phone_number, ()))
     
     def get_recent_logs(self, limit: int = 50) -> List[WebhookLogEntry]:
         """Get most recent webhook logs"""
-        logger.debug(f"Getting recent logs with limit {limit}, total logs: {len(self.webhook_logs)}")
-        
-        # Get the most recent logs (last N entries)
-        if len(self.webhook_logs) <= limit:
-            recent_logs = self.webhook_logs
-        else:
-            recent_logs = self.webhook_logs[-limit:]
-        
-        logger.debug(f"Selected {len(recent_logs)} logs for return")
+        logger.debug("Getting recent logs with limit %s, total logs: %s", limit, len(self.webhook_logs))
         
-        # Convert to WebhookLogEntry objects, most recent first
-        result = [
-            WebhookLogEntry(
-                timestamp=log["timestamp"],
-                message_sid=log["message_sid"],
-                status=MessageStatus(log["status"]),
-                from_number=log["from_number"],
-                to_number=log["to_number"],
-                error_code=log.get("error_code"),
-                error_message=log.get("error_message")
-            )
-            for log in reversed(recent_logs)  # Most recent first
-        ]
+        # Get the most recent logs (last N entries), most recent first
+        result = list(islice(reversed(self.webhook_logs), limit))
         
-        logger.debug(f"Returning {len(result)} webhook log entries")
+        logger.debug("Returning %s webhook log entries", len(result))
         return result
     
     def clear_logs(self):
         """Clear all webhook logs"""
         self.webhook_logs.clear()
+        self.logs_by_status.clear()
+        self.logs_by_number.clear()
         logger.debug("Cleared all webhook logs")
     
     def get_log_count(self) -> int:
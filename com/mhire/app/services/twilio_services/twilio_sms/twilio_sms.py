@@ -1,9 +1,10 @@
+import asyncio
 import logging
 from typing import Optional, Tuple, Dict, Any
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioException
 from fastapi import HTTPException
-from com.mhire.app.config.config import Config
+from com.mhire.app.config.config import config
 from com.mhire.app.common.network_responses import HTTPCode
 from com.mhire.app.services.twilio_services.twilio_sms.twilio_sms_schema import MessageStatus, OrganizationType
 from com.mhire.app.services.twilio_services.sms_utils.mobile_session.mobile_session_manager import MobileSessionManager
@@ -12,11 +13,17 @@ from com.mhire.app.services.chatbot_services.ai_chatbot.ai_chatbot_schema import
 
 logger = logging.getLogger(__name__)
 
+# SMS organization types mapped to the chatbot's prompt types
+CHATBOT_ORGANIZATION_TYPES = {
+    OrganizationType.SMB: ChatbotOrganizationType.SMB,
+    OrganizationType.HRH: ChatbotOrganizationType.HRH
+}
+
 class TwilioSMSService:
     """Service for handling Twilio SMS operations"""
     
     def __init__(self):
-        self.config = Config()
+        self.config = config
         self.mobile_session_manager = MobileSessionManager()
         self.ai_chatbot = AIChatbot()
         
@@ -46,12 +53,7 @@ class TwilioSMSService:
     
     def _get_organization_prompt_type(self, org_type: OrganizationType) -> ChatbotOrganizationType:
         """Convert organization type to prompt type for chatbot"""
-        if org_type == OrganizationType.SMB:
-            return ChatbotOrganizationType.SMB
-        elif org_type == OrganizationType.HRH:
-            return ChatbotOrganizationType.HRH
-        else:
-            return ChatbotOrganizationType.SMB  # default
+        return CHATBOT_ORGANIZATION_TYPES.get(org_type, ChatbotOrganizationType.SMB)
     
     async def process_message_with_chatbot(
         self, 
@@ -61,12 +63,12 @@ class TwilioSMSService:
     ) -> Tuple[Dict[str, Any], str]:
         """Process message through chatbot and return response with session ID"""
         
-        # Get or create session for mobile number
-        mobile_session_id = self.mobile_session_manager.get_or_create_session_for_mobile(mobile_number)
+        # Get or create session for mobile number (resolved once, then used by ID)
+        mobile_session_id = await self.mobile_session_manager.get_or_create_session_for_mobile(mobile_number)
         
         # Add user message to session history
-        self.mobile_session_manager.add_message_to_mobile_session(
-            mobile_number, "user", message
+        await self.mobile_session_manager.add_message_by_session_id(
+            mobile_session_id, "user", message
         )
         
         # Get organization prompt type
@@ -84,8 +86,8 @@ class TwilioSMSService:
             chat_response = await self.ai_chatbot.process_message(chat_request)
             
             # Add bot response to session history
-            self.mobile_session_manager.add_message_to_mobile_session(
-                mobile_number, "assistant", chat_response.response
+            await self.mobile_session_manager.add_message_by_session_id(
+                mobile_session_id, "assistant", chat_response.response
             )
             
             # Prepare response data
@@ -97,16 +99,16 @@ class TwilioSMSService:
                 "appointment_details": None,  # ChatResponse doesn't have this field
                 "session_data": {
                     "session_id": mobile_session_id,
-                    "conversation_history": self.mobile_session_manager.get_mobile_conversation_history(mobile_number),
-                    "in_appointment_booking": self.mobile_session_manager.is_mobile_in_appointment_booking(mobile_number)
+                    "conversation_history": await self.mobile_session_manager.get_conversation_history_by_session_id(mobile_session_id),
+                    "in_appointment_booking": await self.mobile_session_manager.is_in_appointment_booking_by_session_id(mobile_session_id)
                 }
             }
             
-            logger.debug(f"Chatbot processed message for {mobile_number}, session: {mobile_session_id}")
+            logger.debug("Chatbot processed message for %s, session: %s", mobile_number, mobile_session_id)
             return response_data, mobile_session_id
             
         except Exception as e:
-            logger.error(f"Error processing message through chatbot: {str(e)}")
+            logger.error("Error processing message through chatbot: %s", e)
             # Return error response - technical errors should escalate to human
             error_response = {
                 "chatbot_response": "I apologize, but I'm experiencing technical difficulties. Please try again later.",
@@ -116,7 +118,7 @@ class TwilioSMSService:
                 "appointment_details": None,
                 "session_data": {
                     "session_id": mobile_session_id,
-                    "conversation_history": self.mobile_session_manager.get_mobile_conversation_history(mobile_number),
+                    "conversation_history": await self.mobile_session_manager.get_conversation_history_by_session_id(mobile_session_id),
                     "in_appointment_booking": False
                 }
             }
@@ -152,14 +154,15 @@ class TwilioSMSService:
             # Use chatbot response as the message to send
             sms_message = chatbot_data["chatbot_response"]
             
-            # Send SMS through Twilio
-            twilio_message = self.twilio_client.messages.create(
+            # Send SMS through Twilio (the client is blocking, so keep it off the event loop)
+            twilio_message = await asyncio.to_thread(
+                self.twilio_client.messages.create,
                 body=sms_message,
                 from_=self.config.twilio_phone_number,
                 to=mobile_number
             )
             
-            logger.info(f"SMS sent successfully to {mobile_number}, SID: {twilio_message.sid}")
+            logger.info("SMS sent successfully to %s, SID: %s", mobile_number, twilio_message.sid)
             
             # Prepare successful response
             response = {
@@ -172,27 +175,27 @@ class TwilioSMSService:
             return response
             
         except TwilioException as e:
-            logger.error(f"Twilio error sending SMS to {mobile_number}: {str(e)}")
+            logger.error("Twilio error sending SMS to %s: %s", mobile_number, e)
             raise HTTPException(
                 status_code=HTTPCode.BAD_REQUEST,
                 detail=f"Failed to send SMS: {str(e)}"
             )
             
         except Exception as e:
-            logger.error(f"Unexpected error sending SMS to {mobile_number}: {str(e)}")
+            logger.error("Unexpected error sending SMS to %s: %s", mobile_number, e)
             raise HTTPException(
                 status_code=HTTPCode.INTERNAL_SERVER_ERROR,
                 detail=f"Unexpected error: {str(e)}"
             )
     
-    def get_message_status(self, message_sid: str) -> Optional[MessageStatus]:
+    async def get_message_status(self, message_sid: str) -> Optional[MessageStatus]:
         """Get status of a Twilio message"""
         if not self.twilio_client:
             return None
             
         try:
-            message = self.twilio_client.messages(message_sid).fetch()
+            message = await asyncio.to_thread(self.twilio_client.messages(message_sid).fetch)
             return MessageStatus(message.status)
         except TwilioException as e:
-            logger.error(f"Error fetching message status for {message_sid}: {str(e)}")
+            logger.error("Error fetching message status for %s: %s", message_sid, e)
             return None
\ No newline at end of file
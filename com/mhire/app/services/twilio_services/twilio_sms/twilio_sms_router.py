@@ -1,8 +1,11 @@
+import re
 import time
 import logging
-from fastapi import APIRouter, HTTPException, Request, Query, Form
+from urllib.parse import parse_qsl
+from pydantic import ValidationError
+from fastapi import APIRouter, HTTPException, Request, Query
 from fastapi.exceptions import RequestValidationError
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union
 from com.mhire.app.common.network_responses import NetworkResponse, HTTPCode
 from com.mhire.app.services.twilio_services.twilio_sms.twilio_sms_schema import (
     SMSRequest, SMSResponse, WebhookLogResponse, MessageStatus, OrganizationType
@@ -12,6 +15,26 @@ from com.mhire.app.services.twilio_services.sms_utils.webhook_log.webhook_log_ma
 
 logger = logging.getLogger(__name__)
 
+_PHONE_STRIP = re.compile(r'[^\d+]')
+_PHONE_VALID = re.compile(r'\+?\d{10,15}')
+
+# Static (status code, message) pairs for the request validation failures
+_VALIDATION_ERRORS = {
+    "missing_body": (HTTPCode.BAD_REQUEST, "JSON request body required for manual API calls"),
+    "empty_mobile": (HTTPCode.BAD_REQUEST, "Mobile number is required"),
+    "invalid_mobile": (HTTPCode.BAD_REQUEST, "Invalid mobile number format. Please provide a valid phone number."),
+    "empty_message": (HTTPCode.BAD_REQUEST, "Message content is required"),
+    "message_too_long": (HTTPCode.PAYLOAD_TOO_LARGE, "Message is too long for SMS. Maximum 1600 characters allowed."),
+    "missing_organization": (HTTPCode.BAD_REQUEST, "Organization type is required"),
+}
+
+# SMSRequest JSON schema for the docs, with its enum definitions inlined (the handler reads the body itself)
+_SMS_REQUEST_SCHEMA = SMSRequest.model_json_schema()
+_schema_defs = _SMS_REQUEST_SCHEMA.pop("$defs", {})
+for _field_schema in _SMS_REQUEST_SCHEMA["properties"].values():
+    if "$ref" in _field_schema:
+        _field_schema.update(_schema_defs[_field_schema.pop("$ref").rsplit("/", 1)[1]])
+
 router = APIRouter(prefix="/api/v1", tags=["Twilio SMS"])
 network_response = NetworkResponse()
 
@@ -19,43 +42,42 @@ network_response = NetworkResponse()
 twilio_sms_service = TwilioSMSService()
 webhook_log_manager = WebhookLogManager()
 
-async def _detect_request_type(http_request: Request) -> str:
-    """Detect if request is from Twilio webhook or manual API call"""
-    content_type = http_request.headers.get("content-type", "").lower()
-    user_agent = http_request.headers.get("user-agent", "").lower()
-    
-    # Twilio sends form data, manual API sends JSON
-    if "application/x-www-form-urlencoded" in content_type:
-        logger.debug("Detected Twilio webhook request (form data)")
-        return "twilio_webhook"
-    elif "application/json" in content_type:
-        logger.debug("Detected manual API request (JSON)")
-        return "manual_api"
-    else:
-        logger.debug(f"Unknown content type: {content_type}, defaulting to manual API")
-        return "manual_api"
+# Sender recorded in success webhook logs (the config is frozen after startup)
+_FROM_NUMBER = twilio_sms_service.config.twilio_phone_number or "Unknown"
+_STATUS_FAILED = MessageStatus.FAILED  # Status of every error webhook log
+
+def _validation_error(key: str, path: str, start_time: float):
+    """Build the error response for a request validation failure"""
+    http_code, error_message = _VALIDATION_ERRORS[key]
+    return network_response.json_response(
+        http_code=http_code,
+        error_message=error_message,
+        resource=path,
+        start_time=start_time
+    )
 
-async def _parse_twilio_webhook(http_request: Request) -> SMSRequest:
+def _parse_twilio_webhook(body: bytes) -> SMSRequest:
     """Parse Twilio webhook form data into SMSRequest format"""
     try:
-        # Get form data from Twilio webhook
-        form_data = await http_request.form()
+        # Twilio posts a small urlencoded body; parse it directly instead of building Starlette's FormData
+        form_data = dict(parse_qsl(body.decode()))
         
         # Extract Twilio webhook fields
         from_number = form_data.get("From", "")  # User's phone number
         message_body = form_data.get("Body", "")  # User's message
         to_number = form_data.get("To", "")  # Your Twilio number
         
-        logger.debug(f"Twilio webhook data - From: {from_number}, To: {to_number}, Body: '{message_body}'")
+        logger.debug("Twilio webhook data - From: %s, To: %s, Body: '%s'", from_number, to_number, message_body)
         
         # Create SMSRequest object with default organization type
-        sms_request = SMSRequest(
+        # (parse_qsl already yields str fields, and the endpoint re-checks them, so skip model validation)
+        sms_request = SMSRequest.model_construct(
             mobile_number=from_number,  # User's number becomes the mobile_number
             message=message_body,       # User's message
             organization_type=OrganizationType.SMB  # Default to SMB
         )
         
-        logger.info(f"Parsed Twilio webhook into SMSRequest: {from_number} -> '{message_body}'")
+        logger.info("Parsed Twilio webhook into SMSRequest: %s -> '%s'", from_number, message_body)
         return sms_request
         
     except Exception as e:
@@ -65,164 +87,148 @@ async def _parse_twilio_webhook(http_request: Request) -> SMSRequest:
             detail=f"Invalid Twilio webhook format: {str(e)}"
         )
 
-@router.post("/chat/send", response_model=dict)
-async def send_sms_message(
-    http_request: Request, 
-    request: Optional[SMSRequest] = None,
-    # # Twilio webhook form parameters
-    From: Optional[str] = Form(None),
-    Body: Optional[str] = Form(None),
-    To: Optional[str] = Form(None)
-):
+def _parse_json_request(body: bytes) -> SMSRequest:
+    """Validate a manual API JSON body, reporting errors like FastAPI's own body validation"""
+    try:
+        return SMSRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+        )
+
+async def _parse_request(http_request: Request) -> Tuple[str, Optional[SMSRequest]]:
+    """Detect if request is from Twilio webhook or manual API call and parse its body accordingly
+    
+    Returns the request type and the parsed request (None when a manual API call has no body)
+    """
+    content_type = http_request.headers.get("content-type", "").lower()  # Media types are case-insensitive
+    body = await http_request.body()
+    
+    # Twilio sends form data, manual API sends JSON (any other content type is treated as JSON)
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        logger.debug("Detected Twilio webhook request (form data)")
+        return "twilio_webhook", _parse_twilio_webhook(body)
+    
+    logger.debug("Detected manual API request (content type: %s)", content_type)
+    return "manual_api", _parse_json_request(body) if body else None
+
+@router.post(
+    "/chat/send",
+    response_model=dict,
+    openapi_extra={"requestBody": {"content": {"application/json": {"schema": _SMS_REQUEST_SCHEMA}}}}
+)
+async def send_sms_message(http_request: Request):
     """
     Unified endpoint for both manual API calls and Twilio webhook calls
     - Manual API: Send JSON with {mobile_number, message, organization_type}
     - Twilio Webhook: Receives form data from incoming SMS
     """
     start_time = time.time()
+    path = http_request.url.path  # Resolved once for every response below
     
     try:
-        # Detect request type
-        request_type = await _detect_request_type(http_request)
-        logger.info(f"=== SMS REQUEST START ({request_type.upper()}) ===")
+        # Detect request type and parse the body in one pass
+        request_type, parsed_request = await _parse_request(http_request)
+        logger.info("=== SMS REQUEST START (%s) ===", request_type.upper())
         
-        # Parse request based on type
         if request_type == "twilio_webhook":
-            # Parse Twilio webhook form data
-            parsed_request = await _parse_twilio_webhook(http_request)
-            logger.info(f"Twilio Webhook - From: {parsed_request.mobile_number}, Message: '{parsed_request.message}'")
+            logger.info("Twilio Webhook - From: %s, Message: '%s'", parsed_request.mobile_number, parsed_request.message)
         else:
-            # Use provided JSON request for manual API
-            if not request:
+            if parsed_request is None:
                 logger.warning("Manual API call missing JSON request body")
-                return network_response.json_response(
-                    http_code=HTTPCode.BAD_REQUEST,
-                    error_message="JSON request body required for manual API calls",
-                    resource=http_request.url.path,
-                    start_time=start_time
-                )
-            parsed_request = request
-            logger.info(f"Manual API - Mobile: {parsed_request.mobile_number}, Message: '{parsed_request.message}', Org: {parsed_request.organization_type}")
+                return _validation_error("missing_body", path, start_time)
+            logger.info("Manual API - Mobile: %s, Message: '%s', Org: %s", parsed_request.mobile_number, parsed_request.message, parsed_request.organization_type)
         
         # Enhanced validation
         if not parsed_request.mobile_number or not parsed_request.mobile_number.strip():
             logger.warning("Empty mobile number received")
-            return network_response.json_response(
-                http_code=HTTPCode.BAD_REQUEST,
-                error_message="Mobile number is required",
-                resource=http_request.url.path,
-                start_time=start_time
-            )
+            return _validation_error("empty_mobile", path, start_time)
         
         # Validate mobile number format (basic check)
-        mobile_clean = ''.join(char for char in parsed_request.mobile_number if char.isdigit() or char == '+')
-        if len(mobile_clean) < 10 or len(mobile_clean) > 15:
-            logger.warning(f"Invalid mobile number format: {parsed_request.mobile_number}")
-            return network_response.json_response(
-                http_code=HTTPCode.BAD_REQUEST,
-                error_message="Invalid mobile number format. Please provide a valid phone number.",
-                resource=http_request.url.path,
-                start_time=start_time
-            )
+        mobile_clean = _PHONE_STRIP.sub('', parsed_request.mobile_number)
+        if not _PHONE_VALID.fullmatch(mobile_clean):
+            logger.warning("Invalid mobile number format: %s", parsed_request.mobile_number)
+            return _validation_error("invalid_mobile", path, start_time)
         
         if not parsed_request.message or not parsed_request.message.strip():
             logger.warning("Empty message received")
-            return network_response.json_response(
-                http_code=HTTPCode.BAD_REQUEST,
-                error_message="Message content is required",
-                resource=http_request.url.path,
-                start_time=start_time
-            )
+            return _validation_error("empty_message", path, start_time)
         
         # Check message length for SMS limits
         if len(parsed_request.message) > 1600:  # SMS limit
-            logger.warning(f"Message too long for SMS: {len(parsed_request.message)} characters")
-            return network_response.json_response(
-                http_code=HTTPCode.PAYLOAD_TOO_LARGE,
-                error_message="Message is too long for SMS. Maximum 1600 characters allowed.",
-                resource=http_request.url.path,
-                start_time=start_time
-            )
+            logger.warning("Message too long for SMS: %s characters", len(parsed_request.message))
+            return _validation_error("message_too_long", path, start_time)
         
         # Validate organization type
         if not parsed_request.organization_type:
             logger.warning("Missing organization type")
-            return network_response.json_response(
-                http_code=HTTPCode.BAD_REQUEST,
-                error_message="Organization type is required",
-                resource=http_request.url.path,
-                start_time=start_time
-            )
+            return _validation_error("missing_organization", path, start_time)
         
         logger.debug("Processing SMS request through service...")
         
-        # Process through chatbot and send SMS
-        if request_type == "twilio_webhook":
-            # For Twilio webhook, process incoming message and send response
-            result = await twilio_sms_service.send_sms(
-                mobile_number=parsed_request.mobile_number,
-                message=parsed_request.message,
-                organization_type=parsed_request.organization_type
-            )
-        else:
-            # For manual API, same processing
-            result = await twilio_sms_service.send_sms(
-                mobile_number=parsed_request.mobile_number,
-                message=parsed_request.message,
-                organization_type=parsed_request.organization_type
-            )
+        # Process through chatbot and send SMS (same for Twilio webhooks and manual API calls)
+        result = await twilio_sms_service.send_sms(
+            mobile_number=parsed_request.mobile_number,
+            message=parsed_request.message,
+            organization_type=parsed_request.organization_type
+        )
         
-        logger.info(f"SMS processing completed for {parsed_request.mobile_number}")
-        logger.info(f"Mobile Session ID: {result['mobile_session_id']}")
-        logger.info(f"Twilio Message SID: {result['twilio_message_sid']}")
-        logger.info(f"Chatbot Response: '{result['chatbot_response'][:100] if result['chatbot_response'] else 'None'}...'")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("SMS processing completed for %s", parsed_request.mobile_number)
+            logger.info("Mobile Session ID: %s", result['mobile_session_id'])
+            logger.info("Twilio Message SID: %s", result['twilio_message_sid'])
+            logger.info("Chatbot Response: '%s...'", result['chatbot_response'][:100] if result['chatbot_response'] else 'None')
         
         # Log webhook entry for tracking - SUCCESS only (errors are handled by HTTPException)
         webhook_log_manager.add_webhook_log(
             message_sid=result["twilio_message_sid"],
             status=result["twilio_status"],
-            from_number=twilio_sms_service.config.twilio_phone_number or "Unknown",
+            from_number=_FROM_NUMBER,
             to_number=parsed_request.mobile_number,
             error_code=None,
             error_message=None
         )
         
-        # Create response data - clean structure
-        response_data = {
-            "mobile_session_id": result["mobile_session_id"],
-            "twilio_message_sid": result["twilio_message_sid"],
-            "twilio_status": result["twilio_status"].value if result["twilio_status"] else None,
-            "chatbot_response": result["chatbot_response"],
-            "escalation_type": result["escalation_type"],
-            "escalation_message": result["escalation_message"],
-            "appointment_booking": result["appointment_booking"],
-            "appointment_details": result["appointment_details"]
-        }
-        
-        logger.info(f"SMS sent successfully to {parsed_request.mobile_number}")
-        logger.info(f"=== SMS REQUEST END ({request_type.upper()}) ===")
+        logger.info("SMS sent successfully to %s", parsed_request.mobile_number)
+        logger.info("=== SMS REQUEST END (%s) ===", request_type.upper())
         
         # For Twilio webhook, return simple response (Twilio doesn't need complex JSON)
         if request_type == "twilio_webhook":
             return {"status": "success", "message": "SMS processed successfully"}
         else:
+            # Create response data - clean structure
+            response_data = {
+                "mobile_session_id": result["mobile_session_id"],
+                "twilio_message_sid": result["twilio_message_sid"],
+                "twilio_status": result["twilio_status"].value if result["twilio_status"] else None,
+                "chatbot_response": result["chatbot_response"],
+                "escalation_type": result["escalation_type"],
+                "escalation_message": result["escalation_message"],
+                "appointment_booking": result["appointment_booking"],
+                "appointment_details": result["appointment_details"]
+            }
+            
             # For manual API, return full response
             return network_response.success_response(
                 http_code=HTTPCode.SUCCESS,
                 message="SMS sent successfully",
                 data=response_data,
-                resource=http_request.url.path,
+                resource=path,
                 start_time=start_time
             )
-            
+    
+    except RequestValidationError:
+        # Handled by the app's validation error handler
+        raise
+    
     except HTTPException as he:
         logger.error(f"HTTP Exception: {he.detail}")
-        logger.info(f"=== SMS REQUEST END (HTTP ERROR) ===")
+        logger.info("=== SMS REQUEST END (HTTP ERROR) ===")
         
         # Log validation errors to webhook logs
         webhook_log_manager.add_webhook_log(
-            message_sid=f"HTTP_ERROR_{int(time.time())}",
-            status=MessageStatus.FAILED,
+            message_sid=f"HTTP_ERROR_{int(start_time)}",
+            status=_STATUS_FAILED,
             from_number="System",
             to_number=parsed_request.mobile_number if 'parsed_request' in locals() and hasattr(parsed_request, 'mobile_number') else "Unknown",
             error_code="HTTP_ERROR",
@@ -232,18 +238,18 @@ async def send_sms_message(
         return network_response.json_response(
             http_code=he.status_code,
             error_message=he.detail,
-            resource=http_request.url.path,
+            resource=path,
             start_time=start_time
         )
         
     except ValueError as ve:
         logger.error(f"Validation error: {str(ve)}")
-        logger.info(f"=== SMS REQUEST END (VALIDATION ERROR) ===")
+        logger.info("=== SMS REQUEST END (VALIDATION ERROR) ===")
         
         # Log validation errors to webhook logs
         webhook_log_manager.add_webhook_log(
-            message_sid=f"VALUE_ERROR_{int(time.time())}",
-            status=MessageStatus.FAILED,
+            message_sid=f"VALUE_ERROR_{int(start_time)}",
+            status=_STATUS_FAILED,
             from_number="System",
             to_number=parsed_request.mobile_number if 'parsed_request' in locals() and hasattr(parsed_request, 'mobile_number') else "Unknown",
             error_code="VALUE_ERROR",
@@ -253,17 +259,17 @@ async def send_sms_message(
         return network_response.json_response(
             http_code=HTTPCode.UNPROCESSABLE_ENTITY,
             error_message=f"Validation error: {str(ve)}",
-            resource=http_request.url.path,
+            resource=path,
             start_time=start_time
         )
     
     except ConnectionError as ce:
         logger.error(f"Connection error (Twilio API): {str(ce)}")
-        logger.info(f"=== SMS REQUEST END (CONNECTION ERROR) ===")
+        logger.info("=== SMS REQUEST END (CONNECTION ERROR) ===")
         
         webhook_log_manager.add_webhook_log(
-            message_sid=f"CONNECTION_ERROR_{int(time.time())}",
-            status=MessageStatus.FAILED,
+            message_sid=f"CONNECTION_ERROR_{int(start_time)}",
+            status=_STATUS_FAILED,
             from_number="System",
             to_number=parsed_request.mobile_number if 'parsed_request' in locals() and hasattr(parsed_request, 'mobile_number') else "Unknown",
             error_code="CONNECTION_ERROR",
@@ -273,17 +279,17 @@ async def send_sms_message(
         return network_response.json_response(
             http_code=HTTPCode.SERVICE_UNAVAILABLE,
             error_message="SMS service is temporarily unavailable. Please try again later.",
-            resource=http_request.url.path,
+            resource=path,
             start_time=start_time
         )
     
     except TimeoutError as te:
         logger.error(f"Timeout error: {str(te)}")
-        logger.info(f"=== SMS REQUEST END (TIMEOUT ERROR) ===")
+        logger.info("=== SMS REQUEST END (TIMEOUT ERROR) ===")
         
         webhook_log_manager.add_webhook_log(
-            message_sid=f"TIMEOUT_ERROR_{int(time.time())}",
-            status=MessageStatus.FAILED,
+            message_sid=f"TIMEOUT_ERROR_{int(start_time)}",
+            status=_STATUS_FAILED,
             from_number="System",
             to_number=parsed_request.mobile_number if 'parsed_request' in locals() and hasattr(parsed_request, 'mobile_number') else "Unknown",
             error_code="TIMEOUT_ERROR",
@@ -293,18 +299,18 @@ async def send_sms_message(
         return network_response.json_response(
             http_code=HTTPCode.GATEWAY_TIMEOUT,
             error_message="Request timed out. Please try again later.",
-            resource=http_request.url.path,
+            resource=path,
             start_time=start_time
         )
         
     except Exception as e:
         logger.error(f"Unexpected error in send_sms_message: {str(e)}", exc_info=True)
-        logger.info(f"=== SMS REQUEST END (SYSTEM ERROR) ===")
+        logger.info("=== SMS REQUEST END (SYSTEM ERROR) ===")
         
         # Log system errors to webhook logs
         webhook_log_manager.add_webhook_log(
-            message_sid=f"SYSTEM_ERROR_{int(time.time())}",
-            status=MessageStatus.FAILED,
+            message_sid=f"SYSTEM_ERROR_{int(start_time)}",
+            status=_STATUS_FAILED,
             from_number="System",
             to_number=parsed_request.mobile_number if 'parsed_request' in locals() and hasattr(parsed_request, 'mobile_number') else "Unknown",
             error_code="SYSTEM_ERROR",
@@ -314,7 +320,7 @@ async def send_sms_message(
         return network_response.json_response(
             http_code=HTTPCode.INTERNAL_SERVER_ERROR,
             error_message="An unexpected error occurred. Please try again later.",
-            resource=http_request.url.path,
+            resource=path,
             start_time=start_time
         )
 
@@ -328,27 +334,28 @@ async def get_webhook_logs(
     This endpoint retrieves the most recent webhook logs with a limit.
     """
     start_time = time.time()
+    path = http_request.url.path
     
-    logger.info(f"=== WEBHOOK LOGS REQUEST START ===")
-    logger.info(f"Limit: {limit}")
+    logger.info("=== WEBHOOK LOGS REQUEST START ===")
+    logger.info("Limit: %s", limit)
     
     try:
         # Validate limit parameter
         if limit <= 0:
-            logger.warning(f"Invalid limit value: {limit}")
+            logger.warning("Invalid limit value: %s", limit)
             return network_response.json_response(
                 http_code=HTTPCode.BAD_REQUEST,
                 error_message="Limit must be a positive integer",
-                resource=http_request.url.path,
+                resource=path,
                 start_time=start_time
             )
         
         if limit > 1000:
-            logger.warning(f"Limit too high: {limit}")
+            logger.warning("Limit too high: %s", limit)
             return network_response.json_response(
                 http_code=HTTPCode.BAD_REQUEST,
                 error_message="Limit cannot exceed 1000",
-                resource=http_request.url.path,
+                resource=path,
                 start_time=start_time
             )
         
@@ -357,67 +364,64 @@ async def get_webhook_logs(
         # Get recent logs with limit
         logs = webhook_log_manager.get_recent_logs(limit)
         
-        # Convert logs to dict format
-        logs_data = []
-        for log in logs:
-            try:
-                logs_data.append({
-                    "timestamp": log.timestamp,
-                    "message_sid": log.message_sid,
-                    "status": log.status.value,
-                    "from_number": log.from_number,
-                    "to_number": log.to_number,
-                    "error_code": log.error_code,
-                    "error_message": log.error_message
-                })
-            except Exception as log_error:
-                logger.warning(f"Error processing log entry: {log_error}")
-                # Skip corrupted log entries
-                continue
+        # Convert logs to dict format in one pass; stored entries are validated, frozen models.
+        # status stays the MessageStatus member, which orjson writes as its string value.
+        logs_data = [
+            {
+                "timestamp": log.timestamp,
+                "message_sid": log.message_sid,
+                "status": log.status,
+                "from_number": log.from_number,
+                "to_number": log.to_number,
+                "error_code": log.error_code,
+                "error_message": log.error_message
+            }
+            for log in logs
+        ]
         
         response_data = {
             "total_logs": webhook_log_manager.get_log_count(),
             "logs": logs_data
         }
         
-        logger.info(f"Retrieved {len(logs_data)} webhook logs")
-        logger.info(f"=== WEBHOOK LOGS REQUEST END ===")
+        logger.info("Retrieved %s webhook logs", len(logs_data))
+        logger.info("=== WEBHOOK LOGS REQUEST END ===")
         
         return network_response.success_response(
             http_code=HTTPCode.SUCCESS,
             message=f"Retrieved {len(logs_data)} webhook logs",
             data=response_data,
-            resource=http_request.url.path,
+            resource=path,
             start_time=start_time
         )
         
     except HTTPException as he:
         logger.error(f"HTTP Exception in webhook logs: {he.detail}")
-        logger.info(f"=== WEBHOOK LOGS REQUEST END (HTTP ERROR) ===")
+        logger.info("=== WEBHOOK LOGS REQUEST END (HTTP ERROR) ===")
         
         return network_response.json_response(
             http_code=he.status_code,
             error_message=he.detail,
-            resource=http_request.url.path,
+            resource=path,
             start_time=start_time
         )
     
     except MemoryError as me:
         logger.error(f"Memory error retrieving webhook logs: {str(me)}")
-        logger.info(f"=== WEBHOOK LOGS REQUEST END (MEMORY ERROR) ===")
+        logger.info("=== WEBHOOK LOGS REQUEST END (MEMORY ERROR) ===")
         return network_response.json_response(
             http_code=HTTPCode.INTERNAL_SERVER_ERROR,
             error_message="Server is experiencing high load. Please try again with a smaller limit.",
-            resource=http_request.url.path,
+            resource=path,
             start_time=start_time
         )
         
     except Exception as e:
         logger.error(f"Unexpected error retrieving webhook logs: {str(e)}", exc_info=True)
-        logger.info(f"=== WEBHOOK LOGS REQUEST END (SYSTEM ERROR) ===")
+        logger.info("=== WEBHOOK LOGS REQUEST END (SYSTEM ERROR) ===")
         return network_response.json_response(
             http_code=HTTPCode.INTERNAL_SERVER_ERROR,
             error_message="An unexpected error occurred while retrieving logs. Please try again later.",
-            resource=http_request.url.path,
+            resource=path,
             start_time=start_time
         )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any, List
 from enum import Enum
 
@@ -42,6 +42,8 @@ class SMSResponse(BaseModel):
 
 class WebhookLogEntry(BaseModel):
     """Model for webhook log entries"""
+    model_config = ConfigDict(frozen=True)  # Stored entries are shared by every read
+    
     timestamp: str = Field(..., description="Timestamp of the webhook call")
     message_sid: str = Field(..., description="Twilio message SID")
     status: MessageStatus = Field(..., description="Message status")
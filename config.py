@@ -10,6 +10,7 @@ TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 RECIPIENT_PHONE_NUMBER = os.getenv("RECIPIENT_PHONE_NUMBER")
 OPENAI_API_KEY= os.getenv("OPENAI_API_KEY")
+REDIS_URL = os.getenv("REDIS_URL")  # Optional; shares conversations across workers
 
 
-# Add more variables as needed
\ No newline at end of file
+# Add more variables as needed
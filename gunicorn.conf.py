@@ -0,0 +1,18 @@
+import os
+import multiprocessing
+from dotenv import load_dotenv
+
+# Run with: gunicorn  (this file is picked up automatically from the working directory)
+load_dotenv()
+wsgi_app = "com.mhire.app.main:app"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# Uvicorn workers use uvloop and httptools when they are installed.
+# Sessions, booking state and the mobile->session map live in process memory unless
+# REDIS_URL is set, so multi-turn SMS conversations need a single worker without it.
+# (Application and webhook logs stay per-worker either way.)
+worker_class = "uvicorn.workers.UvicornWorker"
+_shared_state = bool(os.getenv("REDIS_URL"))
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() if _shared_state else 1))
+if workers > 1 and not _shared_state:
+    raise RuntimeError("WEB_CONCURRENCY > 1 requires REDIS_URL: conversation state is per-process without it")
\ No newline at end of file
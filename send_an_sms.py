@@ -1,6 +1,5 @@
 from twilio.rest import Client
-import json
-import os
+import orjson
 from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER, RECIPIENT_PHONE_NUMBER
 account_sid = TWILIO_ACCOUNT_SID
 auth_token = TWILIO_AUTH_TOKEN
@@ -12,20 +11,7 @@ message = client.messages.create(
 )
 print(message.sid)
 
-# Save all SIDs to a JSON file as a list
-sid_file = "sms_sid.json"
-if os.path.exists(sid_file):
-    with open(sid_file, "r") as f:
-        try:
-            sid_list = json.load(f)
-            if not isinstance(sid_list, list):
-                sid_list = [sid_list]
-        except json.JSONDecodeError:
-            sid_list = []
-else:
-    sid_list = []
-
-sid_list.append({"sid": message.sid})
-
-with open(sid_file, "w") as f:
-    json.dump(sid_list, f, indent=2)
\ No newline at end of file
+# Append the SID to a JSON Lines file (one {"sid": ...} object per line)
+sid_file = "sms_sid.jsonl"
+with open(sid_file, "ab") as f:
+    f.write(orjson.dumps({"sid": message.sid}, option=orjson.OPT_APPEND_NEWLINE))
\ No newline at end of file